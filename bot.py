@@ -3,101 +3,419 @@ MaiMai Discord Song Quiz Bot
 Main entry point for the Discord bot.
 """
 
-import discord
-from discord.ext import commands
 import os
 import asyncio
-from dotenv import load_dotenv
+import hashlib
+import json
+import logging
+import pkgutil
+import queue
+import signal
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
 
-# Load environment variables
-load_dotenv()
-TOKEN = os.getenv('DISCORD_TOKEN')
+log = logging.getLogger(__name__)
 
-# Bot setup
-intents = discord.Intents.default()
-intents.message_content = True  # Required to read messages for guessing
-intents.messages = True
+# Directory containing cog extensions (every module in it is loaded at startup)
+COGS_DIR = Path(__file__).parent / "cogs"
 
-bot = commands.Bot(command_prefix='q>', intents=intents)
+# Prefixes for text commands (tuple so str.startswith can test them all at once)
+PREFIX_TUPLE = ('q>',)
 
-@bot.event
-async def on_ready():
-    """Called when the bot is ready and connected to Discord."""
-    print(f'✅ {bot.user} has connected to Discord!')
-    print(f'📊 Connected to {len(bot.guilds)} server(s)')
+# Command dispatch runs on a worker pool so slow commands never block the gateway
+MESSAGE_QUEUE_SIZE = 512
+MESSAGE_WORKERS = 8
+COMMAND_TIMEOUT = 30  # Seconds a worker waits on a command before moving on
+SHUTDOWN_DRAIN_TIMEOUT = 10  # Seconds to let queued commands finish on shutdown
+
+# Hashes of the last globally synced command tree, keyed by bot user ID
+SYNC_CACHE_FILE = Path(__file__).parent / ".sync_cache.json"
+
+# Guesses split across several quick messages are joined into one (each
+# message is still checked on its own too)
+GUESS_COALESCE_DELAY = 0.6  # Seconds of silence before a buffered guess is dispatched
+GUESS_COALESCE_WINDOW = 2.0  # Max seconds after the first fragment before a flush
+GUESS_MAX_FRAGMENTS = 5  # Fragments that force a flush without waiting
+
+def setup_logging() -> QueueListener:
+    """Configure logging so the event loop thread only enqueues records.
     
-    # Sync slash commands
+    Records are written to stderr by a QueueListener on a background thread,
+    keeping blocking stream writes off the gateway.
+    """
+    import discord
+    
+    log_queue = queue.SimpleQueue()
+    discord.utils.setup_logging(handler=QueueHandler(log_queue))
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
+
+def command_tree_hash(bot, guild=None) -> str:
+    """Hash the serialized app command tree so unchanged trees can skip syncing."""
+    payload = []
+    for command in bot.tree.get_commands(guild=guild):
+        try:
+            payload.append(command.to_dict(bot.tree))
+        except TypeError:
+            payload.append(command.to_dict())  # discord.py < 2.4
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def load_sync_cache() -> dict:
+    """Load the persisted command tree hashes (empty if missing or unreadable)."""
     try:
-        synced = await bot.tree.sync()
-        print(f'✅ Synced {len(synced)} command(s)')
-    except Exception as e:
-        print(f'❌ Failed to sync commands: {e}')
-
-@bot.event
-async def on_message(message):
-    """Listen to all messages for guess processing."""
-    # Ignore messages from the bot itself
-    if message.author == bot.user:
-        return
+        with open(SYNC_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_sync_cache(cache: dict):
+    """Persist the command tree hashes."""
+    with open(SYNC_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+
+def build_bot(chat_guesses: bool = True):
+    """Create the bot and register its event handlers and commands.
     
-    # Process commands first
-    await bot.process_commands(message)
-    # Note: Guess processing is handled in the quiz cog in this channel
-    # TODO: Process guess if game is active
-
-@bot.event
-async def on_command_error(ctx, error):
-    """Handle command errors."""
-    if isinstance(error, commands.CommandNotFound):
-        return  # Ignore unknown commands
-    elif isinstance(error, commands.MissingPermissions):
+    discord.py is imported here rather than at module level so importing this
+    module (for tooling or tests) doesn't pay for the full library import.
+    
+    Args:
+        chat_guesses: Request the privileged message content intent so players can
+            guess in chat and use q> commands. Without it only slash commands work.
+    """
+    import discord
+    from discord.ext import commands
+    
+    # Bot setup
+    intents = discord.Intents.default()
+    intents.message_content = chat_guesses  # Required to read messages for guessing
+
+    bot = commands.Bot(command_prefix=PREFIX_TUPLE, intents=intents)
+    bot.self_id = None  # Populated in on_ready
+    bot.command_workers = []  # Started in setup_hook
+    bot.slow_commands = set()  # Commands still running after their worker moved on
+    bot.sync_task = None  # Background global command sync, started on first ready
+    bot.active_channels = frozenset()  # Replaced by the quiz cog with its live channel set
+    bot.tree_hashes = {}  # guild_id -> hash of the last command tree synced there
+    bot.guess_buffers = {}  # (channel_id, user_id) -> (first fragment's loop time, message contents)
+    bot.guess_timers = {}  # (channel_id, user_id) -> pending flush TimerHandle
+
+    @bot.event
+    async def on_ready():
+        """Called when the bot is ready and connected to Discord."""
+        # Cache our own ID so on_message can use a plain int compare
+        bot.self_id = bot.user.id
+        log.info('✅ %s has connected to Discord!', bot.user)
+        log.info('📊 Connected to %d server(s)', len(bot.guilds))
+        
+        # Sync in the background so the ready handler returns immediately.
+        # on_ready fires again on reconnects, so only sync once per process.
+        if bot.sync_task is None:
+            bot.sync_task = asyncio.create_task(sync_global_commands())
+    
+    async def sync_global_commands():
+        """Sync slash commands globally, unless the tree is unchanged since the last run."""
+        try:
+            tree_hash = command_tree_hash(bot)
+            cache = load_sync_cache()
+            if cache.get(str(bot.self_id)) == tree_hash:
+                log.info('✅ Commands unchanged since last sync, skipping')
+                return
+            
+            synced = await bot.tree.sync()
+            cache[str(bot.self_id)] = tree_hash
+            save_sync_cache(cache)
+            log.info('✅ Synced %d command(s)', len(synced))
+        except Exception as e:
+            log.error('❌ Failed to sync commands: %s', e)
+
+    async def on_message(message):
+        """Listen to all messages for guess processing."""
+        # Ignore messages from the bot itself
+        if message.author.id == bot.self_id:
+            return
+        
+        # Other bots and webhooks never issue commands
+        if message.author.bot:
+            return
+        
+        # Non-command messages only matter in quiz channels, where they may be guesses
+        if not message.content.startswith(PREFIX_TUPLE):
+            if message.channel.id in bot.active_channels:
+                buffer_guess(message)
+            return
+        
+        # Hand off to the command workers
+        try:
+            bot.message_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            log.warning("⚠️ Command queue full, dropped message %s", message.id)
+
+    if chat_guesses:
+        bot.event(on_message)
+    else:
+        @bot.event
+        async def on_message(message):
+            """Without message content there are no guesses or q> commands to parse."""
+            return
+
+    def buffer_guess(message):
+        """Buffer a guess fragment and (re)start the timer that flushes it.
+        
+        Each new fragment extends the wait, but never past GUESS_COALESCE_WINDOW
+        after the first one, and GUESS_MAX_FRAGMENTS flushes right away, so a
+        player sending a steady stream of messages still gets graded.
+        """
+        key = (message.channel.id, message.author.id)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        started_at, chunks = bot.guess_buffers.setdefault(key, (now, []))
+        chunks.append(message.content)
+        
+        timer = bot.guess_timers.get(key)
+        if timer:
+            timer.cancel()
+        if len(chunks) >= GUESS_MAX_FRAGMENTS:
+            flush_guess(key, message)
+            return
+        delay = min(GUESS_COALESCE_DELAY, started_at + GUESS_COALESCE_WINDOW - now)
+        bot.guess_timers[key] = loop.call_later(max(delay, 0), flush_guess, key, message)
+    
+    def flush_guess(key, message):
+        """Dispatch the buffered fragments to the quiz cog as candidate guesses.
+        
+        The joined text covers an answer split across messages, and each
+        fragment on its own covers separate quick guesses (e.g. "13.5", "13.7").
+        The guess is timed from its first fragment.
+        """
+        bot.guess_timers.pop(key, None)
+        buffered = bot.guess_buffers.pop(key, None)
+        if buffered:
+            guessed_at, chunks = buffered
+            guesses = chunks if len(chunks) == 1 else ['\n'.join(chunks), *chunks]
+            bot.dispatch('quiz_guess', message, guesses, guessed_at)
+
+    async def invoke_command(message):
+        """Invoke a prefixed message as a command, skipping process_commands' re-checks."""
+        # on_message already filtered bots and non-prefixed content
+        ctx = await bot.get_context(message)
+        if ctx.command is not None:
+            await bot.invoke(ctx)
+
+    def finish_slow_command(task):
+        """Forget a command that outlived its worker's wait, logging any error it raised."""
+        bot.slow_commands.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("❌ Error processing command", exc_info=task.exception())
+
+    async def command_worker():
+        """Process queued messages as commands, one at a time per worker."""
+        while True:
+            message = await bot.message_queue.get()
+            task = asyncio.create_task(invoke_command(message))
+            try:
+                # Shielded so a slow command (e.g. q>quiz encoding its first
+                # snippet) isn't cancelled halfway through starting a round;
+                # the worker just stops waiting for it
+                await asyncio.wait_for(asyncio.shield(task), COMMAND_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.warning("⚠️ Command still running after %ss: %s", COMMAND_TIMEOUT, message.content[:50])
+                bot.slow_commands.add(task)
+                task.add_done_callback(finish_slow_command)
+            except Exception:
+                log.exception("❌ Error processing command")
+            finally:
+                bot.message_queue.task_done()
+
+    async def send_missing_permissions(ctx, error):
         await ctx.send("❌ You don't have permission to use this command.")
-    elif isinstance(error, commands.CommandOnCooldown):
+    
+    async def send_cooldown(ctx, error):
         await ctx.send(f"⏱️ This command is on cooldown. Try again in {error.retry_after:.1f}s")
-    else:
-        print(f'❌ Error: {error}')
+    
+    async def send_generic_error(ctx, error):
+        log.error('❌ Error: %s', error)
         await ctx.send(f"❌ An error occurred: {error}")
+    
+    # Exact error type -> handler (None means ignore)
+    error_handlers = {
+        commands.CommandNotFound: None,  # Ignore unknown commands
+        commands.MissingPermissions: send_missing_permissions,
+        commands.CommandOnCooldown: send_cooldown,
+    }
 
-async def setup_hook():
-    """Setup hook to load cogs before bot starts."""
-    try:
-        await bot.load_extension('cogs.quiz')
-        print("✅ Loaded quiz cog")
-    except Exception as e:
-        print(f"❌ Error loading quiz cog: {e}")
-
-# Assign setup hook
-bot.setup_hook = setup_hook
-
-@bot.command(name="sync")
-@commands.is_owner()
-async def sync_commands(ctx):
-    """Force sync slash commands to this server (bot owner only)."""
-    try:
+    @bot.event
+    async def on_command_error(ctx, error):
+        """Handle command errors."""
+        handler = error_handlers.get(type(error), send_generic_error)
+        if handler:
+            await handler(ctx, error)
+
+    async def setup_hook():
+        """Setup hook to load cogs before bot starts."""
+        # Start the command worker pool
+        bot.message_queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        bot.command_workers = [asyncio.create_task(command_worker()) for _ in range(MESSAGE_WORKERS)]
+        
+        # Discover every module in cogs/ and load them concurrently
+        names = [f"cogs.{m.name}" for m in pkgutil.iter_modules([str(COGS_DIR)])]
+        results = await asyncio.gather(
+            *(bot.load_extension(name) for name in names),
+            return_exceptions=True
+        )
+
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                log.error("❌ Error loading %s: %s", name, result)
+            else:
+                log.info("✅ Loaded %s", name)
+
+    # Assign setup hook
+    bot.setup_hook = setup_hook
+
+    @bot.command(name="sync")
+    @commands.is_owner()
+    async def sync_commands(ctx):
+        """Force sync slash commands to this server (bot owner only)."""
+        try:
+            synced = await sync_guild(ctx.guild)
+            if synced is None:
+                await ctx.send("✅ Commands already up to date, nothing to sync.")
+            else:
+                await ctx.send(f"✅ Synced {synced} command(s) to this server!")
+        except Exception as e:
+            await ctx.send(f"❌ Failed to sync: {e}")
+    
+    @bot.tree.command(name="sync", description="Sync slash commands to this server (bot owner only)")
+    @discord.app_commands.guild_only()
+    async def sync_slash(interaction: discord.Interaction):
+        """Slash version of q>sync, usable without the message content intent."""
+        if not await bot.is_owner(interaction.user):
+            await interaction.response.send_message("❌ Only the bot owner can sync commands.", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        try:
+            synced = await sync_guild(interaction.guild)
+            if synced is None:
+                await interaction.followup.send("✅ Commands already up to date, nothing to sync.", ephemeral=True)
+            else:
+                await interaction.followup.send(f"✅ Synced {synced} command(s) to this server!", ephemeral=True)
+        except Exception as e:
+            await interaction.followup.send(f"❌ Failed to sync: {e}", ephemeral=True)
+    
+    async def sync_guild(guild):
+        """Copy global commands to a guild and sync them. Returns None if nothing changed."""
         # Sync to current guild for instant update
-        bot.tree.copy_global_to(guild=ctx.guild)
-        synced = await bot.tree.sync(guild=ctx.guild)
-        await ctx.send(f"✅ Synced {len(synced)} command(s) to this server!")
-    except Exception as e:
-        await ctx.send(f"❌ Failed to sync: {e}")
+        bot.tree.copy_global_to(guild=guild)
+        
+        # Skip the HTTP round-trip if nothing changed since the last sync
+        tree_hash = command_tree_hash(bot, guild)
+        if bot.tree_hashes.get(guild.id) == tree_hash:
+            return None
+        
+        synced = await bot.tree.sync(guild=guild)
+        bot.tree_hashes[guild.id] = tree_hash
+        return len(synced)
+    
+    @bot.command(name="reload")
+    @commands.is_owner()
+    async def reload_cogs(ctx, extension: str = None):
+        """Reload one cog, or all loaded cogs (bot owner only)."""
+        names = [f"cogs.{extension}"] if extension else list(bot.extensions)
+        
+        for name in names:
+            try:
+                # reload_extension rolls back to the old module if the new one fails
+                await bot.reload_extension(name)
+                await ctx.send(f"✅ Reloaded {name}")
+            except Exception as e:
+                await ctx.send(f"❌ Failed to reload {name}: {e}")
+        
+    return bot
+
+async def run_bot(bot, token: str):
+    """Run the bot until it disconnects or SIGINT/SIGTERM asks it to stop.
+    
+    On a shutdown signal, queued commands get a chance to finish before the
+    workers are cancelled and the connection is closed.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+    
+    async with bot:
+        runner = asyncio.create_task(bot.start(token))
+        stopper = asyncio.create_task(stop.wait())
+        done, _ = await asyncio.wait({runner, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        
+        if runner in done:
+            stopper.cancel()
+            runner.result()  # Re-raise login/connection errors
+            return
+        
+        log.info("🛑 Shutting down...")
+        
+        # Let in-flight commands drain, then stop the workers
+        if bot.command_workers:
+            try:
+                await asyncio.wait_for(bot.message_queue.join(), SHUTDOWN_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.warning("⚠️ %d queued command(s) dropped on shutdown", bot.message_queue.qsize())
+        for worker in bot.command_workers:
+            worker.cancel()
+        await asyncio.gather(*bot.command_workers, return_exceptions=True)
+        
+        await bot.close()
+        await runner
 
 def main():
     """Main entry point."""
-    if not TOKEN:
+    from dotenv import load_dotenv
+    
+    # Load environment variables
+    load_dotenv()
+    
+    # Fail fast before discord.py is imported or any bot object is built
+    token = os.environ.get('DISCORD_TOKEN', '').strip()
+    if not token:
         print("❌ Error: DISCORD_TOKEN not found in .env file")
         print("Please create a .env file with your Discord bot token:")
         print("DISCORD_TOKEN=your_token_here")
         return
     
-    print("🚀 Starting MaiMai Quiz Bot...")
+    import discord
+    
+    listener = setup_logging()
+    
+    # Set ENABLE_CHAT_GUESSES=0 to run on slash commands only, without the privileged intent
+    chat_guesses = os.getenv('ENABLE_CHAT_GUESSES', '1').lower() not in ('0', 'false', 'no')
+    
+    # Use uvloop's faster event loop when it's installed (Linux/macOS only)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
+    log.info("🚀 Starting MaiMai Quiz Bot...")
     
     # Start the bot
     try:
-        bot.run(TOKEN)
+        asyncio.run(run_bot(build_bot(chat_guesses=chat_guesses), token))
+    except KeyboardInterrupt:
+        pass
     except discord.LoginFailure:
-        print("❌ Error: Invalid Discord token")
-    except Exception as e:
-        print(f"❌ Error starting bot: {e}")
+        log.error("❌ Error: Invalid Discord token")
+    except Exception:
+        log.exception("❌ Error starting bot")
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     main()
@@ -2,25 +2,199 @@
 Quiz game cog with commands for starting, playing, and managing MaiMai song quiz games.
 """
 
+import aiohttp
 import discord
 from discord import app_commands, ui
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
+import base64
+import bisect
 import random
 import io
 import json
+import logging
+from functools import lru_cache
 from PIL import Image
 from datetime import datetime
-from typing import Optional, Dict, List
+from collections import OrderedDict, deque
+from typing import Optional, Deque, Dict, List, Tuple
 from pathlib import Path
 import sys
 
 # Add parent directory to path to import utils
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.song_loader import load_songs, get_song_image_path, get_song_audio_path
-from utils.matcher import check_answer
+from utils.song_loader import PROJECT_ROOT, load_songs, get_song_image_path, get_song_audio_path
+from utils.matcher import AnswerMatcher
+from utils.snippet_cache import get_snippet
 from utils.constants import CATEGORIES, VERSIONS, CATEGORY_MAPPING, VERSION_MAPPING
 
+log = logging.getLogger(__name__)
+
+# Simple flat waveform for voice messages (256 bytes of audio levels)
+# Discord expects base64-encoded bytes; it never changes, so encode it once
+FLAT_WAVEFORM_B64 = base64.b64encode(bytes([128] * 256)).decode('ascii')
+
+# Song catalog the cog loads from, watched for changes
+SONGS_FILE = PROJECT_ROOT / "output.json"
+
+# Media directories, watched so newly downloaded covers/audio become playable
+MEDIA_DIRS = (PROJECT_ROOT / "images", PROJECT_ROOT / "audio")
+
+# Version of the report submission entries; 2 dropped the "#discriminator" from user_name
+SUBMISSION_SCHEMA_VERSION = 2
+
+# Medals for the top three places on leaderboards
+MEDALS = ("🥇", "🥈", "🥉")
+
+# Maximum number of user display names remembered for leaderboards
+DISPLAY_NAME_CACHE_SIZE = 512
+
+# Lowercased category names accepted from users, and the list shown when one is invalid
+VALID_CATEGORY_KEYS = frozenset(CATEGORY_MAPPING)
+VALID_CATEGORY_LIST = "\n- ".join(f"{jp} ({en})" for jp, en in CATEGORIES.items())
+
+# Answer type -> (name, value) hint fields shown on the round embed
+ROUND_HINT_FIELDS = {
+    'title': lambda song: [("📝 Title", "???")],
+    'artist': lambda song: [("🎤 Artist", "???"), ("📝 Title", song.get('romaji') or song.get('title'))],
+    'difficulty': lambda song: [(" Difficulty", "???")],
+}
+
+# Answer type -> (name, value, inline) song detail fields shown with the answer,
+# built from a SongView. Timeouts and skips use the first, correct guesses the second
+REVEAL_DETAIL_FIELDS = {
+    'title': lambda view: [
+        ("Artist", view.artist, False), ("Difficulty", view.difficulty_display, True), ("Version", view.version, True)
+    ],
+    'artist': lambda view: [("Difficulty", view.difficulty_display, True), ("Version", view.version, True)],
+    'difficulty': lambda view: [
+        ("Title", view.title_display, False), ("Artist", view.artist, False), ("Version", view.version, True)
+    ],
+}
+CORRECT_DETAIL_FIELDS = {
+    'title': lambda view: [
+        ("Difficulty", view.difficulty_display, True), ("Version", view.version, True), ("Artist", view.artist, False)
+    ],
+    'artist': lambda view: [("Difficulty", view.difficulty_display, True), ("Version", view.version, True)],
+    'difficulty': REVEAL_DETAIL_FIELDS['difficulty'],
+}
+
+
+@lru_cache(maxsize=256)
+def _load_image_bytes(image_path: str) -> bytes:
+    """Read a cover image's raw file bytes, cached across rounds."""
+    with open(image_path, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=256)
+def _load_image(image_path: str) -> Image.Image:
+    """Decode a cover image to RGB, cached across rounds. Callers must not modify it."""
+    with Image.open(image_path) as img:
+        return img.convert('RGB')
+
+
+# Use orjson's faster (de)serializer when it's installed
+try:
+    import orjson
+    
+    load_json = orjson.loads
+    
+    def dump_json_line(entry: dict) -> bytes:
+        """Serialize an entry as one UTF-8 JSON line."""
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    load_json = json.loads
+    
+    def dump_json_line(entry: dict) -> bytes:
+        """Serialize an entry as one UTF-8 JSON line."""
+        return (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+@lru_cache(maxsize=128)
+def parse_categories(raw: str) -> Tuple[str, ...]:
+    """Map comma-separated English/Japanese category names to official names, dropping unknown ones."""
+    mapped = (CATEGORY_MAPPING.get(c.strip().lower()) for c in raw.split(','))
+    return tuple(m for m in mapped if m)
+
+
+@lru_cache(maxsize=128)
+def parse_versions(raw: str) -> Tuple[str, ...]:
+    """Map comma-separated English/Japanese version names to official names, keeping unknown ones as typed."""
+    # Unknown names are kept as-is (for partial matches)
+    stripped = (v.strip() for v in raw.split(','))
+    return tuple(VERSION_MAPPING.get(v.lower(), v) for v in stripped)
+
+
+def embed_with_fields(title: str, description: str, color: discord.Color,
+                      fields: List[Tuple[str, str, bool]]) -> discord.Embed:
+    """
+    Build an embed with all its fields in one go, instead of one add_field call each.
+    
+    Args:
+        title: Embed title
+        description: Embed description
+        color: Embed color
+        fields: (name, value, inline) tuples, in display order
+    
+    Returns:
+        The embed
+    """
+    return discord.Embed.from_dict({
+        'title': title,
+        'description': description,
+        'color': color.value,
+        'fields': [{'name': name, 'value': str(value), 'inline': inline} for name, value, inline in fields]
+    })
+
+
+def media_dir_mtimes() -> tuple:
+    """Get the mtimes of MEDIA_DIRS, which change when files are added or removed."""
+    mtimes = []
+    for media_dir in MEDIA_DIRS:
+        try:
+            mtimes.append(media_dir.stat().st_mtime)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def build_media_index(songs: List[dict]) -> Dict[str, set]:
+    """Get the ids of songs that have an image file and an audio file, keyed by mode."""
+    by_media: Dict[str, set] = {'image': set(), 'audio': set()}
+    for song in songs:
+        if get_song_image_path(song):
+            by_media['image'].add(song['song_id'])
+        if get_song_audio_path(song):
+            by_media['audio'].add(song['song_id'])
+    return by_media
+
+
+def append_submission(submissions_file: Path, submission: dict):
+    """
+    Append a player submission to a JSON Lines file.
+    
+    On first use, entries from the old JSON list file of the same name are
+    carried over so no earlier submissions are lost.
+    
+    Args:
+        submissions_file: Path to the .jsonl file
+        submission: The submission entry to append
+    """
+    lines = []
+    if not submissions_file.exists():
+        legacy_file = submissions_file.with_suffix('.json')
+        if legacy_file.exists():
+            try:
+                with open(legacy_file, 'rb') as f:
+                    lines = [dump_json_line(entry) for entry in load_json(f.read())]
+            except ValueError:  # Both json and orjson decode errors subclass ValueError
+                pass
+    
+    lines.append(dump_json_line(submission))
+    with open(submissions_file, 'ab') as f:
+        f.writelines(lines)
+
 
 class SkipButton(ui.View):
     """View with a skip button for quiz rounds."""
@@ -133,29 +307,66 @@ class GameSession:
         }
         
         self.current_round = 0
-        self.song_pool: List[dict] = config.get('song_pool', [])
+        self.song_pool: Deque[dict] = deque(config.get('song_pool', []))
         self.current_song: Optional[dict] = None
+        self.answer_matcher: Optional[AnswerMatcher] = None  # Built for each round's song
         self.scores: Dict[int, int] = {}  # user_id -> score
-        self.round_start_time: Optional[datetime] = None
+        # (-score, first scored order, user_id), kept sorted as scores change so
+        # leaderboards never need a full sort. Ties rank whoever scored first higher
+        self._ranking: List[Tuple[int, int, int]] = []
+        self._score_order: Dict[int, int] = {}  # user_id -> order they first scored in
+        self.round_start_time: Optional[float] = None  # Event loop (monotonic) time
         self.timeout_task: Optional[asyncio.Task] = None
         self.answered = False  # Track if someone answered this round
+        self.prefetch_task: Optional[asyncio.Task] = None  # Warms the next round's media
         
     def next_song(self) -> Optional[dict]:
         """Get the next song from the pool."""
         if not self.song_pool:
             return None
         self.current_round += 1
-        self.current_song = self.song_pool.pop(0)
+        self.current_song = self.song_pool.popleft()
+        self.answer_matcher = AnswerMatcher.build(self.current_song, self.answer_type)
         self.answered = False
         return self.current_song
     
     def add_score(self, user_id: int, points: int = 1):
         """Add points to a user's score."""
-        self.scores[user_id] = self.scores.get(user_id, 0) + points
+        old_score = self.scores.get(user_id)
+        order = self._score_order.setdefault(user_id, len(self._score_order))
+        if old_score is not None:
+            # Drop the user's old ranking entry before re-inserting it
+            del self._ranking[bisect.bisect_left(self._ranking, (-old_score, order, user_id))]
+        
+        self.scores[user_id] = (old_score or 0) + points
+        bisect.insort(self._ranking, (-self.scores[user_id], order, user_id))
     
-    def get_leaderboard(self) -> List[tuple]:
-        """Get sorted leaderboard (user_id, score)."""
-        return sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
+    def get_leaderboard(self, limit: Optional[int] = None) -> List[tuple]:
+        """
+        Get sorted leaderboard (user_id, score).
+        
+        Args:
+            limit: Only return this many top entries, or all if None
+        
+        Returns:
+            List of (user_id, score) tuples, highest score first
+        """
+        ranking = self._ranking if limit is None else self._ranking[:limit]
+        return [(user_id, -neg_score) for neg_score, _, user_id in ranking]
+
+
+class SongView:
+    """Display strings for a song's answer reveal, precomputed when the catalog loads."""
+    
+    __slots__ = ('answers', 'artist', 'version', 'difficulty_display', 'title_display')
+    
+    def __init__(self, answers: Dict[str, str], artist: str, version: str,
+                 difficulty_display: str, title_display: str):
+        self.answers = answers  # answer_type -> formatted correct answer
+        self.artist = artist
+        self.version = version
+        self.difficulty_display = difficulty_display
+        self.title_display = title_display
 
 
 class QuizCog(commands.Cog):
@@ -165,63 +376,211 @@ class QuizCog(commands.Cog):
         self.bot = bot
         self.active_games: Dict[int, GameSession] = {}  # channel_id -> GameSession
         self.creating_games: set = set()  # Track channels currently creating games
+        # Live view of channels with a running game, used by bot.on_message to filter traffic
+        bot.active_channels = self.active_games.keys()
+        # Song catalog, loaded once and indexed for filtering
+        self._all_songs: List[dict] = []
+        self._songs_by_id: Dict[str, dict] = {}
+        self._by_category: Dict[str, set] = {}
+        self._by_version: Dict[str, set] = {}
+        self._by_media: Dict[str, set] = {}  # mode -> ids of songs with that media file
+        self._song_views: Dict[str, SongView] = {}  # song_id -> precomputed display strings
+        self._pool_cache: Dict[tuple, List[dict]] = {}  # (categories, versions, mode) -> songs
+        self._songs_mtime: Optional[float] = None  # output.json mtime the catalog was loaded from
+        self._media_mtimes: tuple = ()  # MEDIA_DIRS mtimes the media index was built from
+        self.load_song_catalog()
+        # Shared HTTP session for voice message uploads, opened in cog_load
+        self._session: Optional[aiohttp.ClientSession] = None
+        # user_id -> display name, LRU-bounded, so leaderboards don't refetch recurring scorers
+        self._display_name_cache: OrderedDict = OrderedDict()
+        # Help and filter listings never change, so build their embeds once
+        self._help_embed = self.build_help_embed()
+        self._prefix_help_embed = self.build_prefix_help_embed()
+        self._filters_embed = self.build_filters_embed()
+    
+    async def cog_load(self):
+        """Open the HTTP session used for voice message uploads."""
+        connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(connector=connector)
+        self.refresh_media_index.start()
+    
+    async def cog_unload(self):
+        """Close the voice message HTTP session."""
+        self.refresh_media_index.cancel()
+        if self._session:
+            await self._session.close()
+            self._session = None
+    
+    def load_song_catalog(self):
+        """Load the master song list and build the category/version indexes."""
+        try:
+            self._songs_mtime = SONGS_FILE.stat().st_mtime
+            all_songs = load_songs(difficulty="master")
+        except FileNotFoundError as e:
+            log.warning("⚠️ %s", e)
+            self._songs_mtime = None
+            all_songs = []
+        
+        by_category: Dict[str, set] = {}
+        by_version: Dict[str, set] = {}
+        for song in all_songs:
+            song_id = song['song_id']
+            by_category.setdefault(song.get('category'), set()).add(song_id)
+            by_version.setdefault(song.get('version'), set()).add(song_id)
+        
+        self._media_mtimes = media_dir_mtimes()
+        by_media = build_media_index(all_songs)
+        
+        self._all_songs = all_songs
+        self._songs_by_id = {song['song_id']: song for song in all_songs}
+        self._by_category = by_category
+        self._by_version = by_version
+        self._by_media = by_media
+        self._song_views = {song['song_id']: self.build_song_view(song) for song in all_songs}
+        self._pool_cache = {}
+        log.info("📚 Loaded %d songs", len(all_songs))
+    
+    @tasks.loop(minutes=5)
+    async def refresh_media_index(self):
+        """Rebuild the media index when files were added to or removed from the media folders."""
+        mtimes = media_dir_mtimes()
+        if mtimes == self._media_mtimes:
+            return
+        
+        # Checking every song's files is a few thousand stats, so do it off the event loop
+        songs = self._all_songs
+        by_media = await asyncio.to_thread(build_media_index, songs)
+        if songs is self._all_songs:
+            self._media_mtimes = mtimes
+            self._by_media = by_media
+            self._pool_cache = {}
+            log.info("📁 Media files changed, rebuilt media index")
+    
+    @refresh_media_index.before_loop
+    async def before_refresh_media_index(self):
+        # The first run would just repeat the check done when the catalog loaded
+        await asyncio.sleep(self.refresh_media_index.minutes * 60)
+    
+    def filter_songs(self, category_list: Optional[List[str]] = None,
+                     version_list: Optional[List[str]] = None,
+                     mode: Optional[str] = None) -> List[dict]:
+        """
+        Get the songs matching any of the given categories and any of the given versions.
+        
+        Args:
+            category_list: Official category names, or None/empty for all categories
+            version_list: Official version names, or None/empty for all versions
+            mode: 'image' or 'audio' to only include songs with that media file
+        
+        Returns:
+            List of matching songs; this may be the cached catalog itself, so don't modify it
+        """
+        # Pick up edits to output.json without needing q>reload_songs
+        try:
+            mtime = SONGS_FILE.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._songs_mtime:
+            self.load_song_catalog()
+        
+        if not category_list and not version_list and not mode:
+            return self._all_songs
+        
+        key = (frozenset(category_list or ()), frozenset(version_list or ()), mode)
+        cached = self._pool_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        id_sets = []
+        if mode:
+            id_sets.append(self._by_media.get(mode, set()))
+        if category_list:
+            id_sets.append(set().union(*(self._by_category.get(c, ()) for c in category_list)))
+        if version_list:
+            id_sets.append(set().union(*(self._by_version.get(v, ()) for v in version_list)))
+        
+        songs = [self._songs_by_id[song_id] for song_id in set.intersection(*id_sets)]
+        self._pool_cache[key] = songs
+        return songs
+    
+    async def resolve_display_name(self, guild: Optional[discord.Guild], user_id: int) -> str:
+        """Get a user's display name, from the cache, guild, or bot before asking the API."""
+        display_name = self._display_name_cache.get(user_id)
+        if display_name:
+            self._display_name_cache.move_to_end(user_id)
+            return display_name
+        
+        # Try getting from guild members first
+        if guild:
+            member = guild.get_member(user_id)
+            if member:
+                display_name = member.display_name
+        # Try bot's user cache
+        if not display_name:
+            user = self.bot.get_user(user_id)
+            if user:
+                display_name = user.display_name
+        # Last resort: fetch from API
+        if not display_name:
+            try:
+                user = await self.bot.fetch_user(user_id)
+                display_name = user.display_name
+            except discord.HTTPException:
+                return f"User {user_id}"
+        
+        self._display_name_cache[user_id] = display_name
+        if len(self._display_name_cache) > DISPLAY_NAME_CACHE_SIZE:
+            self._display_name_cache.popitem(last=False)
+        return display_name
+    
+    async def resolve_display_names(self, guild: Optional[discord.Guild], user_ids: List[int]) -> List[str]:
+        """Resolve several display names at once, fetching cache misses concurrently."""
+        return await asyncio.gather(*(self.resolve_display_name(guild, user_id) for user_id in user_ids))
     
     async def send_voice_message(self, channel: discord.TextChannel, file_path: str, duration_secs: float) -> bool:
         """Send an audio file as a Discord voice message using low-level API."""
-        import aiohttp
-        import base64
-        
         try:
-            # Read the file
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-            
-            # Generate a simple waveform (256 bytes of audio levels)
-            # This is a simplified waveform - Discord expects base64-encoded bytes
-            waveform_bytes = bytes([128] * 256)  # Flat waveform
-            waveform_b64 = base64.b64encode(waveform_bytes).decode('ascii')
-            
-            # Prepare the multipart form data
-            form = aiohttp.FormData()
-            
-            # Add the file
-            form.add_field(
-                'files[0]',
-                file_data,
-                filename='voice-message.ogg',
-                content_type='audio/ogg'
-            )
-            
-            # Add the payload JSON with voice message flag (1 << 13 = 8192)
-            import json
-            payload = {
-                'flags': 8192,  # IS_VOICE_MESSAGE flag
-                'attachments': [{
-                    'id': 0,
-                    'filename': 'voice-message.ogg',
-                    'duration_secs': duration_secs,
-                    'waveform': waveform_b64
-                }]
-            }
-            form.add_field('payload_json', json.dumps(payload))
-            
-            # Send via Discord's HTTP client
-            url = f"https://discord.com/api/v10/channels/{channel.id}/messages"
-            headers = {
-                'Authorization': f'Bot {self.bot.http.token}'
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=form, headers=headers) as resp:
+            with open(file_path, 'rb') as audio_file:
+                # Prepare the multipart form data
+                form = aiohttp.FormData()
+                
+                # Add the file as an open handle so aiohttp streams it in chunks read
+                # off the event loop; the with block closes it even if the request fails
+                form.add_field(
+                    'files[0]',
+                    audio_file,
+                    filename='voice-message.ogg',
+                    content_type='audio/ogg'
+                )
+                
+                # Add the payload JSON with voice message flag (1 << 13 = 8192)
+                payload = {
+                    'flags': 8192,  # IS_VOICE_MESSAGE flag
+                    'attachments': [{
+                        'id': 0,
+                        'filename': 'voice-message.ogg',
+                        'duration_secs': duration_secs,
+                        'waveform': FLAT_WAVEFORM_B64
+                    }]
+                }
+                form.add_field('payload_json', json.dumps(payload))
+                
+                # Send via Discord's HTTP client
+                url = f"https://discord.com/api/v10/channels/{channel.id}/messages"
+                headers = {
+                    'Authorization': f'Bot {self.bot.http.token}'
+                }
+                
+                async with self._session.post(url, data=form, headers=headers) as resp:
                     if resp.status in (200, 201):
                         return True
                     else:
                         error_text = await resp.text()
-                        print(f"Voice message API error {resp.status}: {error_text}")
+                        log.error("❌ Voice message API error %s: %s", resp.status, error_text)
                         return False
                         
-        except Exception as e:
-            print(f"Error sending voice message: {e}")
+        except Exception:
+            log.exception("❌ Error sending voice message")
             return False
     
     def format_answer(self, song: dict, answer_type: str) -> str:
@@ -253,7 +612,75 @@ class QuizCog(commands.Cog):
         difficulty_type = song.get('difficulty', 'master')
         return f"Level {level} ({difficulty_type})"
     
-    def crop_image_for_difficulty(self, image_path: str, difficulty: str) -> io.BytesIO:
+    def build_song_view(self, song: dict) -> SongView:
+        """Precompute the strings shown when a song's answer is revealed."""
+        return SongView(
+            answers={t: self.format_answer(song, t) for t in ('title', 'artist', 'difficulty')},
+            artist=song.get('artist', 'Unknown'),
+            version=song.get('version', 'Unknown'),
+            difficulty_display=self.get_difficulty_display(song),
+            title_display=song.get('romaji') or song.get('title', 'Unknown')
+        )
+    
+    def song_view(self, song: dict) -> SongView:
+        """Get a song's precomputed display strings, building them if the catalog lacks it."""
+        view = self._song_views.get(song['song_id'])
+        if view is None:
+            view = self._song_views[song['song_id']] = self.build_song_view(song)
+        return view
+    
+    async def cancel_timeout(self, game: GameSession):
+        """Cancel the round's timeout task and wait for it to finish, so it's freed promptly."""
+        task = game.timeout_task
+        game.timeout_task = None
+        # The last round's timeout ends the game itself; it must not cancel or await itself
+        if task is None or task.done() or task is asyncio.current_task():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            log.exception("❌ Error in round timeout")
+    
+    def prefetch_next_media(self, game: GameSession):
+        """Start loading the next round's cover into the image caches in the background."""
+        if not game.song_pool:
+            return
+        image_path = get_song_image_path(game.song_pool[0])
+        if image_path:
+            game.prefetch_task = asyncio.create_task(self._prefetch_image(str(image_path), game))
+    
+    async def _prefetch_image(self, image_path: str, game: GameSession):
+        """Read (and for cropped rounds, decode) a cover so the next round finds it cached."""
+        try:
+            await asyncio.to_thread(_load_image_bytes, image_path)
+            if game.mode == 'image' and game.image_difficulty != 'easy':
+                await asyncio.to_thread(_load_image, image_path)
+        except Exception:
+            log.exception("❌ Error prefetching %s", image_path)
+    
+    async def make_answer_file(self, image_path: Path) -> discord.File:
+        """Build the answer thumbnail attachment, reading the image off the event loop."""
+        image_bytes = await asyncio.to_thread(_load_image_bytes, str(image_path))
+        return discord.File(io.BytesIO(image_bytes), filename="answer.png")
+    
+    def build_round_embed(self, game: GameSession, song: dict) -> discord.Embed:
+        """Build the embed announcing a new round."""
+        # Add hint based on answer type (title mode is the fallback)
+        hint_fields = ROUND_HINT_FIELDS.get(game.answer_type, ROUND_HINT_FIELDS['title'])
+        fields = [(name, value, True) for name, value in hint_fields(song)]
+        fields.append(("⏱️ Time Limit", f"{game.time_limit}s", True))
+        
+        return embed_with_fields(
+            f"🎮 Round {game.current_round}/{game.total_rounds}",
+            f"**Guess the {game.answer_type}!**\nType your answer in chat.",
+            discord.Color.green(),
+            fields
+        )
+    
+    def crop_image_for_difficulty(self, image_path: str, difficulty: str) -> Tuple[io.BytesIO, str]:
         """Crop image based on difficulty level.
         
         Args:
@@ -261,39 +688,39 @@ class QuizCog(commands.Cog):
             difficulty: 'easy' (full), 'medium' (25%), or 'hard' (10%)
             
         Returns:
-            BytesIO object containing the cropped PNG image
+            BytesIO object containing the image, and the attachment filename to send it as
         """
-        with Image.open(image_path) as img:
-            width, height = img.size
-            
-            if difficulty == 'easy':
-                # Full image
-                crop_width, crop_height = width, height
-                left, top = 0, 0
-            elif difficulty == 'medium':
-                # 25% of image (50% width x 50% height)
-                crop_width = width // 2
-                crop_height = height // 2
-                # Random position
-                left = random.randint(0, width - crop_width)
-                top = random.randint(0, height - crop_height)
-            else:  # hard
-                # 10% of image area (~31.6% of each dimension)
-                scale = 0.316  # sqrt(0.1) ≈ 0.316
-                crop_width = int(width * scale)
-                crop_height = int(height * scale)
-                # Random position
-                left = random.randint(0, width - crop_width)
-                top = random.randint(0, height - crop_height)
-            
-            # Crop the image
-            cropped = img.crop((left, top, left + crop_width, top + crop_height))
-            
-            # Save to BytesIO
-            output = io.BytesIO()
-            cropped.save(output, format='PNG')
-            output.seek(0)
-            return output
+        if difficulty == 'easy':
+            # Full image, sent as-is without decoding or re-encoding
+            return io.BytesIO(_load_image_bytes(str(image_path))), "cover.png"
+        
+        img = _load_image(str(image_path))
+        width, height = img.size
+        
+        if difficulty == 'medium':
+            # 25% of image (50% width x 50% height)
+            crop_width = width // 2
+            crop_height = height // 2
+            # Random position
+            left = random.randint(0, width - crop_width)
+            top = random.randint(0, height - crop_height)
+        else:  # hard
+            # 10% of image area (~31.6% of each dimension)
+            scale = 0.316  # sqrt(0.1) ≈ 0.316
+            crop_width = int(width * scale)
+            crop_height = int(height * scale)
+            # Random position
+            left = random.randint(0, width - crop_width)
+            top = random.randint(0, height - crop_height)
+        
+        # Crop the image
+        cropped = img.crop((left, top, left + crop_width, top + crop_height))
+        
+        # Save to BytesIO as JPEG, which encodes much faster than PNG
+        output = io.BytesIO()
+        cropped.save(output, format='JPEG', quality=85)
+        output.seek(0)
+        return output, "cover.jpg"
 
     @app_commands.command(name="quiz", description="Start a MaiMai song quiz game")
     @app_commands.describe(
@@ -386,75 +813,34 @@ class QuizCog(commands.Cog):
         
         if categories:
             input_cats = [c.strip() for c in categories.split(',')]
-            category_list = []
-            invalid_cats = []
-            
-            for cat in input_cats:
-                # Try to map English/Japanese to official Japanese name
-                mapped = CATEGORY_MAPPING.get(cat.lower())
-                if mapped:
-                    category_list.append(mapped)
-                else:
-                    invalid_cats.append(cat)
+            lowered = [c.lower() for c in input_cats]
+            
+            # Map English/Japanese names to official Japanese names
+            invalid_cats = [c for c, key in zip(input_cats, lowered) if key not in VALID_CATEGORY_KEYS]
+            category_list = [CATEGORY_MAPPING[key] for key in lowered if key in VALID_CATEGORY_KEYS]
             
             if invalid_cats:
-                valid_list = "\n- ".join([f"{jp} ({en})" for jp, en in CATEGORIES.items()])
-                await interaction.channel.send(f"❌ Invalid categories: {', '.join(invalid_cats)}\n\n**Valid categories:**\n- {valid_list}")
+                await interaction.channel.send(f"❌ Invalid categories: {', '.join(invalid_cats)}\n\n**Valid categories:**\n- {VALID_CATEGORY_LIST}")
                 self.creating_games.discard(channel_id)
                 return
         
         if versions:
-            input_vers = [v.strip() for v in versions.split(',')]
-            version_list = []
-            
-            for ver in input_vers:
-                # Try to map English/Japanese to official Japanese name
-                mapped = VERSION_MAPPING.get(ver.lower())
-                if mapped:
-                    version_list.append(mapped)
-                else:
-                    # If not found, use original (for partial matches)
-                    version_list.append(ver)
+            version_list = parse_versions(versions)
         
         try:
-            # Load all master difficulty songs
-            all_songs = load_songs(difficulty="master")
-            
-            # Filter by categories if specified
-            if category_list:
-                all_songs = [s for s in all_songs if s.get('category') in category_list]
-            
-            # Filter by versions if specified
-            if version_list:
-                all_songs = [s for s in all_songs if s.get('version') in version_list]
-            
-            songs = all_songs
+            # Filter the cached catalog by categories/versions and available media files
+            songs = self.filter_songs(category_list, version_list, mode)
             
             if not songs:
-                await interaction.channel.send("❌ No songs found with the specified filters!")
+                await interaction.channel.send(f"❌ No songs with {mode} files found with the specified filters!")
                 self.creating_games.discard(channel_id)
                 return
             
             if len(songs) < rounds:
                 rounds = len(songs)
             
-            # Shuffle and select songs
-            random.shuffle(songs)
-            song_pool = songs[:rounds]
-            
-            # Filter by available media files
-            if mode == 'image':
-                song_pool = [s for s in song_pool if get_song_image_path(s)]
-            elif mode == 'audio':
-                song_pool = [s for s in song_pool if get_song_audio_path(s)]
-            
-            if not song_pool:
-                await interaction.channel.send(f"❌ No songs with {mode} files available!")
-                self.creating_games.discard(channel_id)
-                return
-            
-            if len(song_pool) < rounds:
-                rounds = len(song_pool)
+            # Randomly select songs
+            song_pool = random.sample(songs, rounds)
             
             # Create game session
             config = {
@@ -504,75 +890,9 @@ class QuizCog(commands.Cog):
             if channel_id in self.active_games:
                 del self.active_games[channel_id]
     
-    async def create_audio_snippet(self, audio_path: str, snippet_length: int, channel_id: int) -> Optional[str]:
-        """Create a random audio snippet from the full audio file."""
-        import subprocess
-        from pathlib import Path
-        import shutil
-        
-        # Get the project root directory (parent of cogs/)
-        project_root = Path(__file__).parent.parent
-        
-        try:
-            # Check if ffmpeg and ffprobe are available
-            if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
-                return None
-            
-            # Get audio duration using ffprobe
-            probe_cmd = [
-                'ffprobe',
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                str(audio_path)
-            ]
-            
-            result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
-                return None
-            
-            duration = float(result.stdout.strip())
-            
-            # If song is shorter than snippet length, use full song
-            if duration <= snippet_length:
-                return str(audio_path)
-            
-            # Pick random start time
-            max_start = duration - snippet_length
-            start_time = random.uniform(0, max_start)
-            
-            # Create snippet with ffmpeg in OGG Opus format for voice message
-            # Use absolute path based on project root
-            snippet_dir = project_root / 'audio' / 'snippets'
-            snippet_dir.mkdir(parents=True, exist_ok=True)
-            
-            snippet_path = snippet_dir / f"snippet_{channel_id}_{int(datetime.now().timestamp())}.ogg"
-            
-            # Use loudnorm filter to normalize audio volume for consistent playback
-            # Target: -16 LUFS (standard for streaming), with true peak at -1.5 dB
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-ss', str(start_time),
-                '-i', str(audio_path),
-                '-t', str(snippet_length),
-                '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11',
-                '-c:a', 'libopus',
-                '-b:a', '64k',
-                '-vbr', 'on',
-                '-compression_level', '10',
-                '-application', 'voip',
-                '-y',
-                str(snippet_path)
-            ]
-            
-            subprocess.run(ffmpeg_cmd, capture_output=True, timeout=30)
-            
-            if snippet_path.exists():
-                return str(snippet_path)
-            return None
-            
-        except Exception as e:
-            return None
+    async def create_audio_snippet(self, audio_path: str, snippet_length: int) -> Optional[str]:
+        """Get a random audio snippet of the song, from the snippet cache when possible."""
+        return await get_snippet(audio_path, snippet_length)
     
     async def start_round(self, channel: discord.TextChannel):
         """Start a new round in the game."""
@@ -585,37 +905,23 @@ class QuizCog(commands.Cog):
             await self.end_game(channel)
             return
         
-        game.round_start_time = datetime.now()
+        game.round_start_time = asyncio.get_running_loop().time()
         
         # Create skip button view
         skip_view = SkipButton(self, channel, game.host_id, timeout=game.time_limit + 10)
         
-        # Create round embed
-        embed = discord.Embed(
-            title=f"🎮 Round {game.current_round}/{game.total_rounds}",
-            description=f"**Guess the {game.answer_type}!**\nType your answer in chat.",
-            color=discord.Color.green()
-        )
-        
-        # Add hint based on answer type
-        if game.answer_type == 'artist':
-            embed.add_field(name="🎤 Artist", value="???", inline=True)
-            embed.add_field(name="📝 Title", value=song.get('romaji') or song.get('title'), inline=True)
-        elif game.answer_type == 'difficulty':
-            embed.add_field(name=" Difficulty", value="???", inline=True)
-        else:  # title mode
-            embed.add_field(name="📝 Title", value="???", inline=True)
-        
-        embed.add_field(name="⏱️ Time Limit", value=f"{game.time_limit}s", inline=True)
+        embed = self.build_round_embed(game, song)
         
         # Add media
         if game.mode == 'image':
             image_path = get_song_image_path(song)
             if image_path:
-                # Crop image based on difficulty
-                cropped_image = self.crop_image_for_difficulty(image_path, game.image_difficulty)
-                file = discord.File(cropped_image, filename="cover.png")
-                embed.set_image(url="attachment://cover.png")
+                # Crop image based on difficulty, off the event loop so other games keep running
+                cropped_image, filename = await asyncio.to_thread(
+                    self.crop_image_for_difficulty, image_path, game.image_difficulty
+                )
+                file = discord.File(cropped_image, filename=filename)
+                embed.set_image(url=f"attachment://{filename}")
                 await channel.send(embed=embed, file=file, view=skip_view)
             else:
                 await channel.send(embed=embed, view=skip_view)
@@ -627,7 +933,7 @@ class QuizCog(commands.Cog):
             audio_path = get_song_audio_path(song)
             if audio_path:
                 # Create audio snippet
-                snippet_path = await self.create_audio_snippet(audio_path, game.snippet_length, channel.id)
+                snippet_path = await self.create_audio_snippet(audio_path, game.snippet_length)
                 if snippet_path:
                     try:
                         # Try to send as voice message
@@ -636,21 +942,14 @@ class QuizCog(commands.Cog):
                             # Fall back to regular file
                             file = discord.File(snippet_path, filename="snippet.ogg")
                             await channel.send(file=file)
-                    except Exception as e:
-                        print(f"Error sending audio: {e}")
+                    except Exception:
+                        log.exception("❌ Error sending audio")
                         # Fall back to regular file
                         try:
                             file = discord.File(snippet_path, filename="snippet.ogg")
                             await channel.send(file=file)
                         except:
                             pass
-                    
-                    # Clean up snippet file if it's not the original
-                    if snippet_path != str(audio_path):
-                        try:
-                            Path(snippet_path).unlink()
-                        except:
-                            pass
                 else:
                     # Fall back to full audio if snippet creation fails
                     file = discord.File(audio_path, filename="song.mp3")
@@ -676,39 +975,25 @@ class QuizCog(commands.Cog):
             
             # Time's up!
             song = game.current_song
-            correct_answer = self.format_answer(song, game.answer_type)
-            artist = song.get('artist', 'Unknown')
-            version = song.get('version', 'Unknown')
+            view = self.song_view(song)
+            correct_answer = view.answers[game.answer_type]
             
-            embed = discord.Embed(
-                title="⏰ Time's Up!",
-                description=f"No one guessed correctly!",
-                color=discord.Color.red()
-            )
-            embed.add_field(name="✅ Correct Answer", value=correct_answer, inline=False)
-            if game.answer_type == 'title':
-                embed.add_field(name="Artist", value=artist, inline=False)
-                embed.add_field(name="Difficulty", value=self.get_difficulty_display(song), inline=True)
-                embed.add_field(name="Version", value=version, inline=True)
-            elif game.answer_type == 'artist':
-                embed.add_field(name="Difficulty", value=self.get_difficulty_display(song), inline=True)
-                embed.add_field(name="Version", value=version, inline=True)
-            elif game.answer_type == 'difficulty':
-                title_display = song.get('romaji') or song.get('title', 'Unknown')
-                embed.add_field(name="Title", value=title_display, inline=False)
-                embed.add_field(name="Artist", value=artist, inline=False)
-                embed.add_field(name="Version", value=version, inline=True)
+            fields = [("✅ Correct Answer", correct_answer, False)]
+            fields += REVEAL_DETAIL_FIELDS[game.answer_type](view)
+            
+            embed = embed_with_fields("⏰ Time's Up!", "No one guessed correctly!", discord.Color.red(), fields)
             
             # Add song image
             image_path = get_song_image_path(song)
             if image_path:
-                file = discord.File(image_path, filename="answer.png")
+                file = await self.make_answer_file(image_path)
                 embed.set_thumbnail(url="attachment://answer.png")
                 await channel.send(embed=embed, file=file)
             else:
                 await channel.send(embed=embed)
             
-            # Wait before next round
+            # Wait before next round, warming its media in the meantime
+            self.prefetch_next_media(game)
             await asyncio.sleep(3)
             
             # Check if game still exists before starting next round
@@ -719,70 +1004,58 @@ class QuizCog(commands.Cog):
             pass  # Task was cancelled (someone answered)
     
     @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Listen for guesses in active game channels."""
-        # Ignore bot messages
-        if message.author.bot:
-            return
-        
-        # Check if there's an active game in this channel
+    async def on_quiz_guess(self, message: discord.Message, guesses: List[str], guessed_at: float):
+        """Handle guesses dispatched by the bot (quick fragments, plus their joined text)."""
+        # Cheapest check first: most channels have no active game
         game = self.active_games.get(message.channel.id)
-        if not game or not game.current_song:
+        if game is None:
             return
         
-        # Check if already answered
-        if game.answered:
+        # Ignore bot messages, rounds not started yet, and rounds already answered
+        if message.author.bot or not game.current_song or game.answered:
             return
         
         # Check answer
-        if check_answer(message.content, game.current_song, game.answer_type):
+        if any(game.answer_matcher.match(guess) for guess in guesses):
             game.answered = True
             
             # Cancel timeout
-            if game.timeout_task:
-                game.timeout_task.cancel()
+            await self.cancel_timeout(game)
             
-            # Calculate response time
-            response_time = (datetime.now() - game.round_start_time).total_seconds()
+            # Calculate response time (from when the guess was typed, not when it was flushed)
+            response_time = guessed_at - game.round_start_time
             
             # Add score
             game.add_score(message.author.id, 1)
             
             # Get correct answer
             song = game.current_song
-            correct_answer = self.format_answer(song, game.answer_type)
-            artist = song.get('artist', 'Unknown')
-            version = song.get('version', 'Unknown')
+            view = self.song_view(song)
+            correct_answer = view.answers[game.answer_type]
             
             # Send success message
-            embed = discord.Embed(
-                title="✅ Correct!",
-                description=f"**{message.author.mention}** got it in **{response_time:.2f}s**!",
-                color=discord.Color.gold()
+            fields = [("Answer", correct_answer, False)]
+            fields += CORRECT_DETAIL_FIELDS[game.answer_type](view)
+            fields.append(("Score", f"{game.scores[message.author.id]} point(s)", True))
+            
+            embed = embed_with_fields(
+                "✅ Correct!",
+                f"**{message.author.mention}** got it in **{response_time:.2f}s**!",
+                discord.Color.gold(),
+                fields
             )
-            embed.add_field(name="Answer", value=correct_answer, inline=False)
-            if game.answer_type == 'difficulty':
-                title_display = song.get('romaji') or song.get('title', 'Unknown')
-                embed.add_field(name="Title", value=title_display, inline=False)
-                embed.add_field(name="Artist", value=artist, inline=False)
-                embed.add_field(name="Version", value=version, inline=True)
-            else:
-                embed.add_field(name="Difficulty", value=self.get_difficulty_display(song), inline=True)
-                embed.add_field(name="Version", value=version, inline=True)
-            if game.answer_type == 'title':
-                embed.add_field(name="Artist", value=artist, inline=False)
-            embed.add_field(name="Score", value=f"{game.scores[message.author.id]} point(s)", inline=True)
             
             # Add song image
             image_path = get_song_image_path(song)
             if image_path:
-                file = discord.File(image_path, filename="answer.png")
+                file = await self.make_answer_file(image_path)
                 embed.set_thumbnail(url="attachment://answer.png")
                 await message.channel.send(embed=embed, file=file)
             else:
                 await message.channel.send(embed=embed)
             
-            # Wait before next round
+            # Wait before next round, warming its media in the meantime
+            self.prefetch_next_media(game)
             await asyncio.sleep(3)
             
             # Check if game still exists before starting next round
@@ -820,42 +1093,26 @@ class QuizCog(commands.Cog):
     
     async def perform_skip(self, channel: discord.TextChannel, game: GameSession):
         """Perform skip logic - shared between button and command."""
-        # Cancel timeout
-        if game.timeout_task:
-            game.timeout_task.cancel()
-        
         game.answered = True  # Mark as answered to prevent timeout message
         
+        # Cancel timeout
+        await self.cancel_timeout(game)
+        
         # Show the answer
         song = game.current_song
         if song:
-            correct_answer = self.format_answer(song, game.answer_type)
-            artist = song.get('artist', 'Unknown')
-            version = song.get('version', 'Unknown')
+            view = self.song_view(song)
+            correct_answer = view.answers[game.answer_type]
             
-            embed = discord.Embed(
-                title="⏭️ Skipped",
-                description="Moving to next round...",
-                color=discord.Color.orange()
-            )
-            embed.add_field(name="✅ Correct Answer", value=correct_answer, inline=False)
-            if game.answer_type == 'title':
-                embed.add_field(name="Artist", value=artist, inline=False)
-                embed.add_field(name="Difficulty", value=self.get_difficulty_display(song), inline=True)
-                embed.add_field(name="Version", value=version, inline=True)
-            elif game.answer_type == 'artist':
-                embed.add_field(name="Difficulty", value=self.get_difficulty_display(song), inline=True)
-                embed.add_field(name="Version", value=version, inline=True)
-            elif game.answer_type == 'difficulty':
-                title_display = song.get('romaji') or song.get('title', 'Unknown')
-                embed.add_field(name="Title", value=title_display, inline=False)
-                embed.add_field(name="Artist", value=artist, inline=False)
-                embed.add_field(name="Version", value=version, inline=True)
+            fields = [("✅ Correct Answer", correct_answer, False)]
+            fields += REVEAL_DETAIL_FIELDS[game.answer_type](view)
+            
+            embed = embed_with_fields("⏭️ Skipped", "Moving to next round...", discord.Color.orange(), fields)
             
             # Add song image
             image_path = get_song_image_path(song)
             if image_path:
-                file = discord.File(image_path, filename="answer.png")
+                file = await self.make_answer_file(image_path)
                 embed.set_thumbnail(url="attachment://answer.png")
                 await channel.send(embed=embed, file=file)
             else:
@@ -863,6 +1120,7 @@ class QuizCog(commands.Cog):
         else:
             await channel.send("⏭️ Skipping to next round...")
         
+        self.prefetch_next_media(game)
         await asyncio.sleep(2)
         
         # Check if game still exists before starting next round
@@ -888,19 +1146,20 @@ class QuizCog(commands.Cog):
                 await interaction.channel.send("📊 No scores yet!")
             return
         
-        leaderboard = game.get_leaderboard()
-        
-        embed = discord.Embed(
-            title="📊 Leaderboard",
-            description=f"Round {game.current_round}/{game.total_rounds}",
-            color=discord.Color.purple()
+        top = game.get_leaderboard(limit=10)
+        names = await self.resolve_display_names(interaction.guild, [user_id for user_id, _ in top])
+        fields = []
+        for i, ((user_id, score), display_name) in enumerate(zip(top, names), 1):
+            medal = MEDALS[i - 1] if i <= len(MEDALS) else f"{i}."
+            fields.append((f"{medal} {display_name}", f"{score} point(s)", False))
+        
+        embed = embed_with_fields(
+            "📊 Leaderboard",
+            f"Round {game.current_round}/{game.total_rounds}",
+            discord.Color.purple(),
+            fields
         )
         
-        for i, (user_id, score) in enumerate(leaderboard[:10], 1):
-            user = await self.bot.fetch_user(user_id)
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            embed.add_field(name=f"{medal} {user.display_name}", value=f"{score} point(s)", inline=False)
-        
         try:
             await interaction.response.send_message(embed=embed)
         except discord.errors.NotFound:
@@ -934,55 +1193,37 @@ class QuizCog(commands.Cog):
     
     async def end_game(self, channel: discord.TextChannel, cancelled: bool = False):
         """End the game and show final results."""
-        game = self.active_games.get(channel.id)
+        # Remove the game up front so concurrent callers can't both end it
+        game = self.active_games.pop(channel.id, None)
+        self.creating_games.discard(channel.id)
         if not game:
-            # Ensure cleanup even if game not found
-            self.active_games.pop(channel.id, None)
-            self.creating_games.discard(channel.id)
             return
         
         # Cancel any pending timeout
-        if game.timeout_task:
-            game.timeout_task.cancel()
+        await self.cancel_timeout(game)
         
         try:
             # Create final results embed
-            embed = discord.Embed(
-                title="🏁 Game Over!" if not cancelled else "🛑 Game Stopped",
-                description=f"Played {game.current_round} round(s)",
-                color=discord.Color.gold() if not cancelled else discord.Color.red()
-            )
-            
+            description = f"Played {game.current_round} round(s)"
+            fields = []
             if game.scores:
-                leaderboard = game.get_leaderboard()
-                
                 # Add top 3
-                for i, (user_id, score) in enumerate(leaderboard[:3], 1):
-                    display_name = None
-                    # Try getting from guild members first
-                    if channel.guild:
-                        member = channel.guild.get_member(user_id)
-                        if member:
-                            display_name = member.display_name
-                    # Try bot's user cache
-                    if not display_name:
-                        user = self.bot.get_user(user_id)
-                        if user:
-                            display_name = user.display_name
-                    # Last resort: fetch from API
-                    if not display_name:
-                        try:
-                            user = await self.bot.fetch_user(user_id)
-                            display_name = user.display_name
-                        except:
-                            display_name = f"User {user_id}"
-                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
-                    embed.add_field(name=f"{medal} {display_name}", value=f"{score} point(s)", inline=False)
-                
+                top = game.get_leaderboard(limit=3)
+                names = await self.resolve_display_names(channel.guild, [user_id for user_id, _ in top])
+                for i, ((user_id, score), display_name) in enumerate(zip(top, names), 1):
+                    fields.append((f"{MEDALS[i - 1]} {display_name}", f"{score} point(s)", False))
+            else:
+                description += "\n\nNo scores recorded."
+            
+            embed = embed_with_fields(
+                "🏁 Game Over!" if not cancelled else "🛑 Game Stopped",
+                description,
+                discord.Color.gold() if not cancelled else discord.Color.red(),
+                fields
+            )
+            if game.scores:
                 # Show total participants
                 embed.set_footer(text=f"Total players: {len(game.scores)}")
-            else:
-                embed.description += "\n\nNo scores recorded."
             
             # Create Play Again button with original config
             play_again_view = PlayAgainButton(
@@ -994,12 +1235,8 @@ class QuizCog(commands.Cog):
             )
             
             await channel.send(embed=embed, view=play_again_view)
-        except Exception as e:
-            print(f"Error in end_game: {e}")
-        finally:
-            # Always remove game from active games and creating games
-            self.active_games.pop(channel.id, None)
-            self.creating_games.discard(channel.id)
+        except Exception:
+            log.exception("❌ Error in end_game")
     
     async def start_game_with_config(self, channel: discord.TextChannel, host_id: int, config: dict):
         """Start a new game with the given config (used by Play Again button)."""
@@ -1010,46 +1247,20 @@ class QuizCog(commands.Cog):
         self.creating_games.add(channel.id)
         
         try:
-            # Load all master difficulty songs
-            all_songs = load_songs(difficulty="master")
-            
-            if not all_songs:
+            if not self._all_songs:
                 await channel.send("❌ No songs found in database!")
                 self.creating_games.discard(channel.id)
                 return
             
-            # Apply category filter if it was used
-            category_list = None
-            if config.get('categories'):
-                input_cats = [c.strip() for c in config['categories'].split(',')]
-                category_list = []
-                for cat in input_cats:
-                    mapped = CATEGORY_MAPPING.get(cat.lower())
-                    if mapped:
-                        category_list.append(mapped)
-                
-                if category_list:
-                    all_songs = [s for s in all_songs if s.get('category') in category_list]
-            
-            # Apply version filter if it was used
-            version_list = None
-            if config.get('versions'):
-                input_vers = [v.strip() for v in config['versions'].split(',')]
-                version_list = []
-                for ver in input_vers:
-                    mapped = VERSION_MAPPING.get(ver.lower())
-                    if mapped:
-                        version_list.append(mapped)
-                    else:
-                        version_list.append(ver)
-                
-                if version_list:
-                    all_songs = [s for s in all_songs if s.get('version') in version_list]
+            # Apply category/version filters if they were used
+            category_list = parse_categories(config['categories']) if config.get('categories') else None
+            version_list = parse_versions(config['versions']) if config.get('versions') else None
             
-            songs = all_songs
+            mode = config['mode']
+            songs = self.filter_songs(category_list, version_list, mode)
             
             if not songs:
-                await channel.send("❌ No songs found with the specified filters!")
+                await channel.send(f"❌ No songs with {mode} files found with the specified filters!")
                 self.creating_games.discard(channel.id)
                 return
             
@@ -1057,24 +1268,8 @@ class QuizCog(commands.Cog):
             if len(songs) < rounds:
                 rounds = len(songs)
             
-            # Shuffle and select songs
-            random.shuffle(songs)
-            song_pool = songs[:rounds]
-            
-            # Filter by available media files
-            mode = config['mode']
-            if mode == 'image':
-                song_pool = [s for s in song_pool if get_song_image_path(s)]
-            elif mode == 'audio':
-                song_pool = [s for s in song_pool if get_song_audio_path(s)]
-            
-            if not song_pool:
-                await channel.send(f"❌ No songs with {mode} files available!")
-                self.creating_games.discard(channel.id)
-                return
-            
-            if len(song_pool) < rounds:
-                rounds = len(song_pool)
+            # Randomly select songs
+            song_pool = random.sample(songs, rounds)
             
             # Update config with new song pool
             new_config = config.copy()
@@ -1112,16 +1307,14 @@ class QuizCog(commands.Cog):
             await self.start_round(channel)
             
         except Exception as e:
-            print(f"Error starting game with config: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("❌ Error starting game with config")
             await channel.send(f"❌ Error starting game: {str(e)}")
             self.creating_games.discard(channel.id)
             self.active_games.pop(channel.id, None)
     
-    @app_commands.command(name="filters", description="Show available categories and versions for filtering")
-    async def show_filters(self, interaction: discord.Interaction):
-        """Show available filter options."""
+    @staticmethod
+    def build_filters_embed() -> discord.Embed:
+        """Build the static /filters embed."""
         embed = discord.Embed(
             title="📋 Available Filters",
             description="Use these in `/quiz` with comma-separated values (case-insensitive, English or Japanese)",
@@ -1142,14 +1335,19 @@ class QuizCog(commands.Cog):
         
         embed.set_footer(text="Example: /quiz categories:pops,touhou versions:festival,buddies")
         
+        return embed
+    
+    @app_commands.command(name="filters", description="Show available categories and versions for filtering")
+    async def show_filters(self, interaction: discord.Interaction):
+        """Show available filter options."""
         try:
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.response.send_message(embed=self._filters_embed, ephemeral=True)
         except discord.errors.NotFound:
-            await interaction.channel.send(embed=embed)
+            await interaction.channel.send(embed=self._filters_embed)
     
-    @app_commands.command(name="help", description="Show help information about the quiz bot")
-    async def help_command(self, interaction: discord.Interaction):
-        """Display comprehensive help information."""
+    @staticmethod
+    def build_help_embed() -> discord.Embed:
+        """Build the static /help embed."""
         embed = discord.Embed(
             title="🎮 MaiMai Quiz Bot Help",
             description="Welcome to the MaiMai song quiz bot! Test your knowledge of MaiMai songs.",
@@ -1220,10 +1418,15 @@ class QuizCog(commands.Cog):
         
         embed.set_footer(text="Have fun and enjoy the quiz! 🎵")
         
+        return embed
+    
+    @app_commands.command(name="help", description="Show help information about the quiz bot")
+    async def help_command(self, interaction: discord.Interaction):
+        """Display comprehensive help information."""
         try:
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.response.send_message(embed=self._help_embed, ephemeral=True)
         except discord.errors.NotFound:
-            await interaction.channel.send(embed=embed)
+            await interaction.channel.send(embed=self._help_embed)
     
     @app_commands.command(name="report_translation", description="Report an incorrect English translation")
     @app_commands.describe(
@@ -1234,34 +1437,19 @@ class QuizCog(commands.Cog):
         """Allow players to submit translation corrections."""
         # Create submission entry
         submission = {
+            "schema_version": SUBMISSION_SCHEMA_VERSION,
             "timestamp": datetime.now().isoformat(),
             "user_id": interaction.user.id,
-            "user_name": f"{interaction.user.name}#{interaction.user.discriminator}",
+            "user_name": interaction.user.name,
             "japanese_title": japanese_title,
             "suggested_translation": suggested_translation,
             "server_id": interaction.guild_id if interaction.guild else None,
             "server_name": interaction.guild.name if interaction.guild else "DM"
         }
         
-        # Save to file
-        submissions_file = Path("translation_submissions.json")
-        submissions = []
-        
-        # Load existing submissions if file exists
-        if submissions_file.exists():
-            try:
-                with open(submissions_file, 'r', encoding='utf-8') as f:
-                    submissions = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                submissions = []
-        
-        # Add new submission
-        submissions.append(submission)
-        
-        # Save updated submissions
+        # Append to the submissions log
         try:
-            with open(submissions_file, 'w', encoding='utf-8') as f:
-                json.dump(submissions, f, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(append_submission, Path("translation_submissions.jsonl"), submission)
             
             embed = discord.Embed(
                 title="✅ Translation Submitted",
@@ -1288,34 +1476,19 @@ class QuizCog(commands.Cog):
         """Allow players to report audio issues."""
         # Create submission entry
         submission = {
+            "schema_version": SUBMISSION_SCHEMA_VERSION,
             "timestamp": datetime.now().isoformat(),
             "user_id": interaction.user.id,
-            "user_name": f"{interaction.user.name}#{interaction.user.discriminator}",
+            "user_name": interaction.user.name,
             "song_title": song_title,
             "issue_description": issue_description,
             "server_id": interaction.guild_id if interaction.guild else None,
             "server_name": interaction.guild.name if interaction.guild else "DM"
         }
         
-        # Save to file
-        submissions_file = Path("audio_submissions.json")
-        submissions = []
-        
-        # Load existing submissions if file exists
-        if submissions_file.exists():
-            try:
-                with open(submissions_file, 'r', encoding='utf-8') as f:
-                    submissions = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                submissions = []
-        
-        # Add new submission
-        submissions.append(submission)
-        
-        # Save updated submissions
+        # Append to the submissions log
         try:
-            with open(submissions_file, 'w', encoding='utf-8') as f:
-                json.dump(submissions, f, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(append_submission, Path("audio_submissions.jsonl"), submission)
             
             embed = discord.Embed(
                 title="✅ Audio Issue Reported",
@@ -1369,34 +1542,18 @@ class QuizCog(commands.Cog):
             image_difficulty = 'easy'
         
         try:
-            # Load songs
-            all_songs = load_songs(difficulty="master")
-            songs = all_songs
+            # Songs with the media files this mode needs
+            songs = self.filter_songs(mode=mode)
             
             if not songs:
-                await ctx.send("❌ No songs found!")
+                await ctx.send(f"❌ No songs with {mode} files available!")
                 self.creating_games.discard(channel_id)
                 return
             
             if len(songs) < rounds:
                 rounds = len(songs)
             
-            random.shuffle(songs)
-            song_pool = songs[:rounds]
-            
-            # Filter by available media files
-            if mode == 'image':
-                song_pool = [s for s in song_pool if get_song_image_path(s)]
-            elif mode == 'audio':
-                song_pool = [s for s in song_pool if get_song_audio_path(s)]
-            
-            if not song_pool:
-                await ctx.send(f"❌ No songs with {mode} files available!")
-                self.creating_games.discard(channel_id)
-                return
-            
-            if len(song_pool) < rounds:
-                rounds = len(song_pool)
+            song_pool = random.sample(songs, rounds)
             
             config = {
                 'mode': mode,
@@ -1436,6 +1593,13 @@ class QuizCog(commands.Cog):
             if channel_id in self.active_games:
                 del self.active_games[channel_id]
     
+    @commands.command(name="reload_songs")
+    @commands.is_owner()
+    async def prefix_reload_songs(self, ctx):
+        """Reload the song catalog from output.json. Usage: q>reload_songs"""
+        self.load_song_catalog()
+        await ctx.send(f"✅ Reloaded {len(self._all_songs)} songs")
+    
     @commands.command(name="skip")
     async def prefix_skip(self, ctx):
         """Skip the current round. Usage: q>skip"""
@@ -1464,9 +1628,6 @@ class QuizCog(commands.Cog):
             await ctx.send("❌ Only the host can stop the game!")
             return
         
-        if game.timeout_task:
-            game.timeout_task.cancel()
-        
         await self.end_game(ctx.channel, cancelled=True)
     
     @commands.command(name="lb", aliases=["leaderboard"])
@@ -1478,7 +1639,7 @@ class QuizCog(commands.Cog):
             await ctx.send("❌ No active game in this channel!")
             return
         
-        leaderboard = game.get_leaderboard()
+        leaderboard = game.get_leaderboard(limit=10)
         
         if not leaderboard:
             await ctx.send("No scores yet!")
@@ -1489,19 +1650,18 @@ class QuizCog(commands.Cog):
             color=discord.Color.gold()
         )
         
-        lb_text = ""
-        for i, (user_id, score) in enumerate(leaderboard[:10], 1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            lb_text += f"{medal} <@{user_id}>: {score} point(s)\n"
-        
-        embed.description = lb_text
+        lines = [
+            f"{MEDALS[i - 1] if i <= len(MEDALS) else f'{i}.'} <@{user_id}>: {score} point(s)"
+            for i, (user_id, score) in enumerate(leaderboard, 1)
+        ]
+        embed.description = "\n".join(lines)
         embed.set_footer(text=f"Round {game.current_round}/{game.total_rounds}")
         
         await ctx.send(embed=embed)
     
-    @commands.command(name="qhelp", aliases=["qh"])
-    async def prefix_help(self, ctx):
-        """Show help message. Usage: q>qhelp"""
+    @staticmethod
+    def build_prefix_help_embed() -> discord.Embed:
+        """Build the static q>qhelp embed."""
         embed = discord.Embed(
             title="🎵 MaiMai Quiz Bot Help",
             description="Guess songs from the MaiMai rhythm game!",
@@ -1544,7 +1704,12 @@ class QuizCog(commands.Cog):
             inline=True
         )
         
-        await ctx.send(embed=embed)
+        return embed
+    
+    @commands.command(name="qhelp", aliases=["qh"])
+    async def prefix_help(self, ctx):
+        """Show help message. Usage: q>qhelp"""
+        await ctx.send(embed=self._prefix_help_embed)
 
 
 async def setup(bot):
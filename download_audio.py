@@ -5,10 +5,18 @@ Searches for songs based on title and artist, downloads audio previews.
 
 import json
 import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import yt_dlp
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration
 AUDIO_DIR = Path("audio")
 OUTPUT_JSON = Path("output.json")
@@ -18,22 +26,28 @@ PREVIEW_LENGTH = None  # None for full song, or set to seconds for preview
 PREVIEW_START = 30   # Start position if using previews
 TEST_LIMIT = None  # Set to None to download all, or number to test with limited songs
 DEBUG = False  # Set to True for verbose output to debug 403 errors
+SEARCH_WORKERS = 8  # Concurrent YouTube searches
+DOWNLOAD_WORKERS = 4  # Concurrent downloads, each pacing itself with a jittered delay
+DOWNLOAD_DELAY = (1, 3)  # Seconds each download worker waits after a download
+RATE_LIMIT = 2_000_000  # Max download speed per download in bytes/second
 
 # Create audio directory if it doesn't exist
 AUDIO_DIR.mkdir(exist_ok=True)
 
 def load_songs():
     """Load and filter songs from output.json (master difficulty only)."""
-    with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
-        songs = json.load(f)
+    if orjson is not None:
+        songs = orjson.loads(OUTPUT_JSON.read_bytes())
+    else:
+        with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
+            songs = json.load(f)
     
     # Filter to master difficulty and deduplicate by song_id
     master_songs = {}
     for song in songs:
         if song.get('difficulty') == 'master':
-            song_id = song['song_id']
-            if song_id not in master_songs:
-                master_songs[song_id] = song
+            # First chart per song_id wins
+            master_songs.setdefault(song['song_id'], song)
     
     return list(master_songs.values())
 
@@ -47,8 +61,8 @@ def get_audio_filename(song):
         # Fallback: use song_id
         return f"{song['song_id']}.mp3"
 
-def search_youtube(query):
-    """Search YouTube and return the first video URL."""
+def build_search_opts():
+    """Build yt-dlp options for flat YouTube searches."""
     # Check if cookies.txt exists
     cookies_file = Path("cookies.txt")
     
@@ -66,24 +80,60 @@ def search_youtube(query):
         if DEBUG:
             print(f"  🍪 Using cookies from: {cookies_file}")
     
+    return ydl_opts
+
+def search_youtube(ydl, query):
+    """Search YouTube with the calling thread's YoutubeDL instance and return the first video URL."""
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            result = ydl.extract_info(f"ytsearch1:{query}", download=False)
-            if result and 'entries' in result and len(result['entries']) > 0:
-                video_url = result['entries'][0]['url']
-                video_title = result['entries'][0].get('title', 'Unknown')
-                if DEBUG:
-                    print(f"  🔗 Found: {video_title}")
-                    print(f"  🔗 URL: {video_url}")
-                return video_url
+        result = ydl.extract_info(f"ytsearch1:{query}", download=False)
+        if result and 'entries' in result and len(result['entries']) > 0:
+            video_url = result['entries'][0]['url']
+            video_title = result['entries'][0].get('title', 'Unknown')
+            if DEBUG:
+                print(f"  🔗 Found: {video_title}")
+                print(f"  🔗 URL: {video_url}")
+            return video_url
     except Exception as e:
-        print(f"  ❌ Search error: {e}")
+        print(f"  ❌ Search error ({query}): {e}")
         if DEBUG:
             import traceback
             traceback.print_exc()
     
     return None
 
+def search_all(queries):
+    """
+    Run YouTube searches concurrently, with one YoutubeDL instance per worker.
+    
+    YoutubeDL isn't thread-safe, so each worker thread builds its own on its
+    first search and reuses it for the rest.
+    
+    Args:
+        queries: Search queries to run
+    
+    Returns:
+        List of video URLs (or None) in the same order as queries
+    """
+    opts = build_search_opts()
+    local = threading.local()
+    instances = []
+    instances_lock = threading.Lock()
+    
+    def search(query):
+        ydl = getattr(local, 'ydl', None)
+        if ydl is None:
+            ydl = local.ydl = yt_dlp.YoutubeDL(opts)
+            with instances_lock:
+                instances.append(ydl)
+        return search_youtube(ydl, query)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+            return list(executor.map(search, queries))
+    finally:
+        for ydl in instances:
+            ydl.close()
+
 def download_audio(url, output_path):
     """Download audio from YouTube URL."""
     # Check if cookies.txt exists
@@ -104,6 +154,7 @@ def download_audio(url, output_path):
         'quiet': not DEBUG,
         'no_warnings': not DEBUG,
         'verbose': DEBUG,
+        'ratelimit': RATE_LIMIT,
         # Additional options for debugging 403 errors
         'http_headers': {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -153,6 +204,35 @@ def download_audio(url, output_path):
             traceback.print_exc()
         return False
 
+def process_song(job, total):
+    """
+    Download one song's audio in a worker thread.
+    
+    Args:
+        job: (index, song, audio filename, audio path, video URL or None)
+        total: Number of songs being downloaded, for progress output
+    
+    Returns:
+        None on success, otherwise the failure reason
+    """
+    i, song, audio_filename, audio_path, video_url = job
+    name = song.get('romaji') or song.get('title', 'Unknown')
+    
+    if not video_url:
+        print(f"[{i}/{total}] ❌ {name}: No results found")
+        return "No YouTube results"
+    
+    print(f"[{i}/{total}] 📥 Downloading {name} ({song.get('artist', 'Unknown')})...")
+    success = download_audio(video_url, audio_path)
+    if success:
+        print(f"[{i}/{total}] ✅ Saved: {audio_filename}")
+    else:
+        print(f"[{i}/{total}] ❌ Failed to download {name}")
+    
+    # Each worker paces itself with jitter to avoid YouTube throttling
+    time.sleep(random.uniform(*DOWNLOAD_DELAY))
+    return None if success else "Download error"
+
 def main():
     print("🎵 MaiMai Audio Downloader")
     print("=" * 60)
@@ -170,52 +250,48 @@ def main():
     
     # Download audio for each song
     songs_to_process = songs[:TEST_LIMIT] if TEST_LIMIT else songs
-    total_songs = len(songs_to_process)
     
-    for i, song in enumerate(songs_to_process, 1):
-        title = song.get('title', 'Unknown')
-        romaji = song.get('romaji', '')
-        artist = song.get('artist', 'Unknown')
-        
-        # Display progress
-        print(f"\n[{i}/{total_songs}] {romaji or title}")
-        print(f"  Artist: {artist}")
-        
-        # Check if audio already exists
+    # Skip songs that already have audio, collect the rest for searching
+    pending = []
+    for song in songs_to_process:
         audio_filename = get_audio_filename(song)
         audio_path = AUDIO_DIR / audio_filename
         
         if audio_path.exists():
-            print(f"  ⏭️  Already exists: {audio_filename}")
             skipped += 1
             continue
         
-        # Create search query (prefer original title for better YouTube results)
-        search_query = f"{title} {artist}"
-        print(f"  🔍 Searching: {search_query}")
-        
-        # Search YouTube
-        video_url = search_youtube(search_query)
-        
-        if not video_url:
-            print(f"  ❌ No results found")
-            failed += 1
-            failed_songs.append({"title": title, "romaji": romaji, "artist": artist, "reason": "No YouTube results"})
-            continue
-        
-        print(f"  📥 Downloading...")
-        
-        # Download audio
-        if download_audio(video_url, audio_path):
-            print(f"  ✅ Saved: {audio_filename}")
+        pending.append((song, audio_filename, audio_path))
+    
+    print(f"⏭️  {skipped} songs already downloaded, {len(pending)} to go")
+    
+    # Search YouTube for all pending songs up front
+    # (prefer original title for better YouTube results)
+    queries = [f"{song.get('title', 'Unknown')} {song.get('artist', 'Unknown')}" for song, _, _ in pending]
+    print(f"\n🔍 Searching YouTube for {len(queries)} songs...")
+    video_urls = search_all(queries)
+    
+    total_pending = len(pending)
+    jobs = [
+        (i, song, audio_filename, audio_path, video_url)
+        for i, ((song, audio_filename, audio_path), video_url) in enumerate(zip(pending, video_urls), 1)
+    ]
+    
+    print(f"\n📥 Downloading {total_pending} songs with {DOWNLOAD_WORKERS} workers...")
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        results = list(executor.map(lambda job: process_song(job, total_pending), jobs))
+    
+    for (_, song, _, _, _), reason in zip(jobs, results):
+        if reason is None:
             downloaded += 1
         else:
-            print(f"  ❌ Failed to download")
             failed += 1
-            failed_songs.append({"title": title, "romaji": romaji, "artist": artist, "reason": "Download error"})
-        
-        # Rate limiting to avoid YouTube throttling
-        time.sleep(2)
+            failed_songs.append({
+                "title": song.get('title', 'Unknown'),
+                "romaji": song.get('romaji', ''),
+                "artist": song.get('artist', 'Unknown'),
+                "reason": reason
+            })
     
     # Summary
     print("\n" + "=" * 60)
@@ -3,12 +3,33 @@ Script to manually add audio files for MaiMai songs with missing audio.
 Allows user to input YouTube links for each song that's missing audio.
 """
 
+import asyncio
 import json
 import os
+import re
+import shutil
+import threading
+import time
 from pathlib import Path
 import yt_dlp
 import sys
 import argparse
+import tempfile
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 # Configuration
 AUDIO_DIR = Path("audio")
@@ -17,6 +38,26 @@ OUTPUT_JSON = Path("output.json")
 AUDIO_FORMAT = "mp3"
 AUDIO_QUALITY = "5"  # 0=best, 9=worst
 PROGRESS_FILE = Path("manual_download_progress.json")
+PROGRESS_LOG = Path("manual_download_progress.log")  # Events since the last snapshot
+PROGRESS_LOG_CODES = {"completed": "C", "skipped": "S"}
+PROGRESS_LOG_KINDS = {code: kind for kind, code in PROGRESS_LOG_CODES.items()}
+PROGRESS_FSYNC_EVERY = 10  # Log events between fsyncs
+PROGRESS_COMPACT_EVERY = 500  # Log events between full snapshots
+YTDLP_CACHE_DIR = Path(".yt-dlp-cache")
+OEMBED_URL = "https://www.youtube.com/oembed"
+# oEmbed answers these for removed or private videos (401 is left out: it also
+# covers videos that merely can't be embedded but still download fine)
+OEMBED_UNAVAILABLE_STATUSES = frozenset({403, 404})
+OEMBED_TIMEOUT = 5  # seconds
+# Video URLs (watch, shorts, embed, live and youtu.be links), capturing the 11-character video ID
+YOUTUBE_URL_RE = re.compile(
+    r'(?:https?://)?(?:(?:www|m|music)\.)?'
+    r'(?:youtube\.com/(?:watch\?(?:\S*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})',
+    re.IGNORECASE
+)
+SONG_FIELDS = ('song_id', 'title', 'romaji', 'artist', 'image')  # Song fields kept in memory
+MAX_PARALLEL_DOWNLOADS = 4  # Downloads running in the background while you paste URLs
+RATE_LIMIT_RETRIES = 3  # Retries with exponential backoff when YouTube returns 429
 
 def parse_args():
     """Parse command line arguments."""
@@ -33,28 +74,50 @@ NEW_SONGS_DIR.mkdir(exist_ok=True)
 
 def copy_to_new_songs(audio_path: Path):
     """Copy an audio file to the new_songs directory."""
-    import shutil
     try:
         dest_path = NEW_SONGS_DIR / audio_path.name
-        shutil.copy2(audio_path, dest_path)
+        try:
+            # A hard link costs nothing on the same filesystem; copy otherwise
+            # (or when an older copy is already there)
+            os.link(audio_path, dest_path)
+        except OSError:
+            shutil.copy2(audio_path, dest_path)
         print(f"  📋 Copied to new_songs/: {audio_path.name}")
         return True
     except Exception as e:
         print(f"  ⚠️  Failed to copy to new_songs/: {e}")
         return False
 
+def iter_charts():
+    """
+    Yield chart entries from output.json.
+    
+    With ijson installed, entries are parsed one at a time, so charts that get
+    filtered out are never all held in memory at once.
+    """
+    with open(OUTPUT_JSON, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, 'item')
+        elif orjson is not None:
+            yield from orjson.loads(f.read())
+        else:
+            yield from json.load(f)
+
 def load_songs():
     """Load and filter songs from output.json (master difficulty only)."""
-    with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
-        songs = json.load(f)
-    
     # Filter to master difficulty and deduplicate by song_id
     master_songs = {}
-    for song in songs:
+    for song in iter_charts():
         if song.get('difficulty') == 'master':
             song_id = song['song_id']
             if song_id not in master_songs:
-                master_songs[song_id] = song
+                # Only keep what this script uses, not every chart field
+                master_songs[song_id] = {key: song[key] for key in SONG_FIELDS if key in song}
+    
+    # Work out each song's audio filename and path once instead of at every use
+    for song in master_songs.values():
+        song['audio_filename'] = get_audio_filename(song)
+        song['audio_path'] = AUDIO_DIR / song['audio_filename']
     
     return list(master_songs.values())
 
@@ -68,61 +131,82 @@ def get_audio_filename(song):
         # Fallback: use song_id
         return f"{song['song_id']}.mp3"
 
+def existing_audio_files():
+    """Get the names of all files in AUDIO_DIR with a single directory read."""
+    with os.scandir(AUDIO_DIR) as entries:
+        return {entry.name for entry in entries if entry.is_file()}
+
 def find_missing_audio(songs):
     """Find songs that don't have corresponding audio files."""
-    missing = []
-    for song in songs:
-        audio_filename = get_audio_filename(song)
-        audio_path = AUDIO_DIR / audio_filename
-        
-        if not audio_path.exists():
-            missing.append(song)
-    
-    return missing
+    existing = existing_audio_files()
+    return [song for song in songs if song['audio_filename'] not in existing]
 
-def search_songs(songs, query):
-    """Search songs by title, romaji, or artist."""
-    query_lower = query.lower()
-    results = []
+class SongSearchIndex:
+    """
+    Case-insensitive substring search over song titles, romaji and artists.
     
-    for song in songs:
-        title = song.get('title', '').lower()
-        romaji = song.get('romaji', '').lower()
-        artist = song.get('artist', '').lower()
-        
-        if query_lower in title or query_lower in romaji or query_lower in artist:
-            results.append(song)
+    Fields are lowercased once up front, and every 3-character substring maps
+    to the songs containing it. A query only has to check the songs that
+    contain all of its trigrams instead of scanning the whole catalog.
+    """
+    
+    SEARCH_FIELDS = ('title', 'romaji', 'artist')
     
-    return results
+    def __init__(self, songs):
+        self.songs = songs
+        self.keys = []
+        self.trigrams = {}
+        for i, song in enumerate(songs):
+            fields = tuple((song.get(field) or '').lower() for field in self.SEARCH_FIELDS)
+            self.keys.append(fields)
+            for text in fields:
+                for j in range(len(text) - 2):
+                    self.trigrams.setdefault(text[j:j + 3], set()).add(i)
+    
+    def search(self, query):
+        """
+        Find songs whose title, romaji or artist contains query.
+        
+        Returns:
+            Matching songs, in catalog order
+        """
+        query_lower = query.lower()
+        
+        if len(query_lower) < 3:
+            candidates = range(len(self.songs))
+        else:
+            postings = [self.trigrams.get(query_lower[j:j + 3], set()) for j in range(len(query_lower) - 2)]
+            candidates = sorted(set.intersection(*sorted(postings, key=len)))
+        
+        keys = self.keys
+        return [
+            self.songs[i] for i in candidates
+            if any(query_lower in text for text in keys[i])
+        ]
 
 def find_songs_with_audio(songs):
     """Find songs that have audio files (for replace mode)."""
-    with_audio = []
-    for song in songs:
-        audio_filename = get_audio_filename(song)
-        audio_path = AUDIO_DIR / audio_filename
-        
-        if audio_path.exists():
-            with_audio.append(song)
-    
-    return with_audio
+    existing = existing_audio_files()
+    return [song for song in songs if song['audio_filename'] in existing]
 
-def download_audio(url, output_path):
-    """Download audio from YouTube URL."""
+def build_ydl_opts():
+    """Build the yt-dlp options shared by every download in a session."""
     # Check if cookies.txt exists
     cookies_file = Path("cookies.txt")
     
     ydl_opts = {
         'format': 'bestaudio/best',
-        'outtmpl': str(output_path.with_suffix('')),  # Without extension
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
             'preferredcodec': AUDIO_FORMAT,
             'preferredquality': AUDIO_QUALITY,
         }],
-        'quiet': False,  # Show download progress
+        'quiet': True,  # Progress bars from parallel downloads would garble the prompt
+        'noprogress': True,
         'no_warnings': False,
         'noplaylist': True,  # Download only the video, not playlist
+        # Reuse YouTube's player JS/signature data between songs and runs
+        'cachedir': str(YTDLP_CACHE_DIR),
         # Additional options for better compatibility
         'http_headers': {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -138,39 +222,397 @@ def download_audio(url, output_path):
     if cookies_file.exists():
         ydl_opts['cookiefile'] = str(cookies_file)
     
+    return ydl_opts
+
+_ydl_local = threading.local()  # One YoutubeDL per download thread
+
+def get_ydl():
+    """
+    Get this thread's YoutubeDL instance, creating it on first use.
+    
+    Downloads run on several threads at once and each one points outtmpl at
+    its own song, so every thread needs an instance of its own.
+    """
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        ydl = _ydl_local.ydl = yt_dlp.YoutubeDL(build_ydl_opts())
+    return ydl
+
+def is_rate_limited(error):
+    """Check whether a yt-dlp error was YouTube throttling us."""
+    message = str(error).lower()
+    return '429' in message or 'too many requests' in message
+
+def download_audio(url, output_path):
+    """
+    Download audio from YouTube URL, backing off if YouTube rate limits us.
+    
+    Returns:
+        Path of the downloaded audio file, or None if the download failed
+    """
+    ydl = get_ydl()
+    # Point this thread's instance at the song's file instead of rebuilding it
+    # Without extension, and with '%' escaped so yt-dlp doesn't treat it as a template field
+    ydl.params['outtmpl'] = {'default': str(output_path.with_suffix('')).replace('%', '%%')}
+    
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            info = ydl.extract_info(url, download=True)
+            break
+        except Exception as e:
+            if attempt < RATE_LIMIT_RETRIES and is_rate_limited(e):
+                delay = 2 ** (attempt + 1)
+                print(f"  ⏳ Rate limited, retrying in {delay}s...")
+                time.sleep(delay)
+                continue
+            print(f"  ❌ Download error: {e}")
+            return None
+    
+    # yt-dlp reports where the post-processed file ended up, which stays
+    # correct even with other downloads writing to the same directory
+    downloads = info.get('requested_downloads') or [{}]
+    return Path(downloads[-1].get('filepath') or output_path)
+
+def move_into_place(saved_path, audio_path):
+    """
+    Rename a downloaded file to the song's expected filename if yt-dlp named it differently.
+    
+    Returns:
+        Path the file ended up at
+    """
+    if saved_path == audio_path:
+        return audio_path
+    
+    print(f"  🔄 Renaming '{saved_path.name}' to '{audio_path.name}'")
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        return True
-    except Exception as e:
-        print(f"  ❌ Download error: {e}")
-        return False
+        saved_path.rename(audio_path)
+        return audio_path
+    except OSError as e:
+        print(f"  ⚠️  Rename failed: {e}")
+        return saved_path
 
 def load_progress():
-    """Load progress from previous session."""
+    """
+    Load progress from the last snapshot, plus any events logged since then.
+    
+    Returns:
+        Dict mapping 'skipped' and 'completed' to sets of song IDs
+    """
+    progress = {"skipped": set(), "completed": set()}
     if PROGRESS_FILE.exists():
         try:
-            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            if orjson is not None:
+                snapshot = orjson.loads(PROGRESS_FILE.read_bytes())
+            else:
+                with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            for kind in progress:
+                progress[kind].update(snapshot.get(kind, []))
         except:
-            return {"skipped": [], "completed": []}
-    return {"skipped": [], "completed": []}
+            pass
+    
+    # Replay events recorded after the snapshot was written
+    if PROGRESS_LOG.exists():
+        with open(PROGRESS_LOG, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Torn final write from a crash
+                code, _, song_id = line[:-1].partition(' ')
+                kind = PROGRESS_LOG_KINDS.get(code)
+                if kind and song_id:
+                    progress[kind].add(song_id)
+    
+    return progress
 
 def save_progress(progress):
-    """Save progress to file."""
-    with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(progress, f, indent=2, ensure_ascii=False)
+    """Save a full progress snapshot, replacing the old one atomically."""
+    snapshot = {kind: sorted(song_ids) for kind, song_ids in progress.items()}
+    # Write to a unique temp file next to the snapshot and move it into place, so
+    # an interrupted write never truncates the previous snapshot
+    fd, temp_path = tempfile.mkstemp(dir=PROGRESS_FILE.parent, prefix='.progress', suffix='.tmp')
+    try:
+        if orjson is not None:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(snapshot, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, PROGRESS_FILE)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+class ProgressLog:
+    """
+    Records skipped/completed songs as one appended line each.
+    
+    Rewriting the whole progress JSON for every song gets slower as the lists
+    grow, so events are appended to PROGRESS_LOG instead and folded into a
+    PROGRESS_FILE snapshot every PROGRESS_COMPACT_EVERY events and when the
+    session ends. load_progress() replays the log, so a crash loses nothing.
+    """
+    
+    def __init__(self, progress):
+        self.progress = progress
+        self._log = open(PROGRESS_LOG, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._since_snapshot = 0
+    
+    def record(self, kind, song_id):
+        """Record a song as 'completed' or 'skipped'."""
+        self.progress[kind].add(song_id)
+        self._log.write(f"{PROGRESS_LOG_CODES[kind]} {song_id}\n")
+        self._log.flush()
+        
+        self._unsynced += 1
+        if self._unsynced >= PROGRESS_FSYNC_EVERY:
+            os.fsync(self._log.fileno())
+            self._unsynced = 0
+        
+        self._since_snapshot += 1
+        if self._since_snapshot >= PROGRESS_COMPACT_EVERY:
+            self.compact()
+    
+    def compact(self):
+        """Write a full snapshot and empty the log it now covers."""
+        save_progress(self.progress)
+        # Truncate through the open handle (deleting an open file fails on Windows)
+        self._log.seek(0)
+        self._log.truncate()
+        self._unsynced = 0
+        self._since_snapshot = 0
+    
+    def close(self):
+        """Compact and close the log; safe to call more than once."""
+        if self._log.closed:
+            return
+        self.compact()
+        self._log.close()
+
+def format_song_info(song, heading, *extra_lines):
+    """Format a song's details as one block, so it goes out in a single write."""
+    lines = ["", "=" * 60, heading, f"  Title (JP):  {song.get('title', 'Unknown')}"]
+    if song.get('romaji'):
+        lines.append(f"  Title (Rom): {song['romaji']}")
+    lines.append(f"  Artist:      {song.get('artist', 'Unknown')}")
+    lines.append(f"  Filename:    {song['audio_filename']}")
+    lines.extend(extra_lines)
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+def youtube_video_id(url):
+    """Get the video ID from a YouTube URL, or None if it isn't one."""
+    match = YOUTUBE_URL_RE.match(url)
+    return match.group(1) if match else None
+
+async def check_video_available(session, video_id):
+    """
+    Ask YouTube's oEmbed endpoint whether a video can be fetched.
+    
+    This takes a fraction of a second, where a yt-dlp run on a dead video
+    takes several before it fails.
+    
+    Args:
+        session: Shared aiohttp session
+        video_id: 11-character YouTube video ID
+    
+    Returns:
+        False if YouTube reports the video as unavailable, True otherwise
+        (including when the check itself fails)
+    """
+    params = {"url": f"https://www.youtube.com/watch?v={video_id}", "format": "json"}
+    try:
+        async with session.get(OEMBED_URL, params=params) as response:
+            return response.status not in OEMBED_UNAVAILABLE_STATUSES
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return True
 
 def get_user_input(prompt):
     """Get user input with proper encoding handling."""
-    print(prompt, end='', flush=True)
     try:
-        return input().strip()
+        return input(prompt).strip()
     except EOFError:
         return None
     except KeyboardInterrupt:
         raise
 
+def start_stdin_reader(loop):
+    """
+    Read stdin on a daemon thread and feed the lines to an asyncio queue.
+    
+    Using a daemon thread (rather than run_in_executor) means a pending input()
+    can't keep the process alive after Ctrl+C. Lines typed ahead of a prompt
+    are queued, so several URLs can be pasted at once.
+    """
+    lines = asyncio.Queue()
+    
+    def reader():
+        while True:
+            try:
+                line = input()
+            except EOFError:
+                line = None
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+            if line is None:
+                return
+    
+    threading.Thread(target=reader, daemon=True).start()
+    return lines
+
+async def get_user_input_async(lines, prompt):
+    """Prompt for a line from the stdin reader without blocking the event loop."""
+    print(prompt, end='', flush=True)
+    line = await lines.get()
+    if line is None:
+        # Keep reporting EOF to later prompts
+        lines.put_nowait(None)
+        return None
+    return line.strip()
+
+async def progress_writer(results, progress_log, stats):
+    """
+    Apply song outcomes from the results queue one at a time.
+    
+    This is the only place progress is updated and saved, so the progress file
+    stays consistent while several downloads finish at once.
+    """
+    while True:
+        outcome = await results.get()
+        if outcome is None:
+            return
+        kind, song_id = outcome
+        stats[kind] += 1
+        if kind != "failed":
+            progress_log.record(kind, song_id)
+
+async def download_one(sem, results, failed_songs, song, url):
+    """Download one song in the background and report the outcome to the progress writer."""
+    audio_path = song['audio_path']
+    name = song.get('romaji') or song.get('title', 'Unknown')
+    
+    async with sem:
+        print(f"\n  📥 Downloading {name} from: {url}")
+        saved_path = await asyncio.to_thread(download_audio, url, audio_path)
+    
+    if saved_path is None or not saved_path.exists():
+        print(f"\n  ❌ Download failed for {name}, it will be asked again at the end")
+        failed_songs.append(song)
+        await results.put(("failed", song['song_id']))
+        return
+    
+    saved_path = move_into_place(saved_path, audio_path)
+    print(f"\n  ✅ Successfully saved: {saved_path.name}")
+    # A cross-filesystem copy can take a while, so keep it off the prompt's thread
+    await asyncio.to_thread(copy_to_new_songs, saved_path)
+    await results.put(("completed", song['song_id']))
+
+async def process_songs(remaining_songs, progress_log, stats):
+    """
+    Prompt for a URL per song while earlier songs download in the background.
+    
+    Up to MAX_PARALLEL_DOWNLOADS downloads run at once. Songs whose download
+    failed are asked for again once the pass is done.
+    
+    Returns:
+        False if the user quit early, True once every song was handled
+    """
+    lines = start_stdin_reader(asyncio.get_running_loop())
+    sem = asyncio.Semaphore(MAX_PARALLEL_DOWNLOADS)
+    results = asyncio.Queue()
+    writer = asyncio.create_task(progress_writer(results, progress_log, stats))
+    used_video_ids = set()  # YouTube video IDs entered this session
+    # One pooled session for URL pre-checks, so connections are reused between songs
+    session = None
+    if aiohttp is not None:
+        session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=OEMBED_TIMEOUT))
+    
+    try:
+        songs = remaining_songs
+        while songs:
+            downloads = []
+            failed_songs = []
+            quit_requested = False
+            
+            for i, song in enumerate(songs, 1):
+                song_id = song.get('song_id')
+                print(format_song_info(song, f"[{i}/{len(songs)}] Song Information:"))
+                
+                while True:
+                    user_input = await get_user_input_async(lines, "\n🔗 Enter YouTube URL (or 's' to skip, 'q' to quit, 'list' to preview): ")
+                    
+                    if user_input is None or user_input.lower() == 'q':
+                        quit_requested = True
+                        break
+                    
+                    if user_input.lower() == 's':
+                        print("  ⏭️  Skipped")
+                        await results.put(("skipped", song_id))
+                        break
+                    
+                    if user_input.lower() == 'list':
+                        preview = ["\n📋 Next 10 songs:"]
+                        for j in range(i, min(i + 10, len(songs) + 1)):
+                            s = songs[j-1]
+                            preview.append(f"  {j}. {s.get('romaji') or s.get('title')} - {s.get('artist')}")
+                        print("\n".join(preview))
+                        continue
+                    
+                    if not user_input:
+                        print("  ⚠️  Please enter a valid URL or command")
+                        continue
+                    
+                    # Validate URL format
+                    video_id = youtube_video_id(user_input)
+                    if not video_id:
+                        print("  ⚠️  This doesn't look like a YouTube URL. Try again.")
+                        continue
+                    
+                    # The same video for two songs is almost always a paste mistake
+                    if video_id in used_video_ids:
+                        confirm = await get_user_input_async(lines, "  ⚠️  You already used this video for another song. Use it anyway? (y/n): ")
+                        if confirm is None or confirm.lower() != 'y':
+                            continue
+                    
+                    if session is not None and not await check_video_available(session, video_id):
+                        confirm = await get_user_input_async(lines, "  ⚠️  YouTube reports this video as unavailable or private. Try it anyway? (y/n): ")
+                        if confirm is None or confirm.lower() != 'y':
+                            continue
+                    used_video_ids.add(video_id)
+                    
+                    # Download in the background and move on to the next song
+                    downloads.append(asyncio.create_task(download_one(sem, results, failed_songs, song, user_input)))
+                    break
+                
+                if quit_requested:
+                    break
+            
+            pending = sum(not task.done() for task in downloads)
+            if pending:
+                print(f"\n⏳ Waiting for {pending} download(s) to finish...")
+            await asyncio.gather(*downloads)
+            
+            if quit_requested:
+                print("\n👋 Quitting...")
+                return False
+            
+            if failed_songs:
+                print(f"\n⚠️  {len(failed_songs)} download(s) failed. Try a different URL or skip.")
+            songs = failed_songs
+        
+        return True
+    finally:
+        if session is not None:
+            await session.close()
+        results.put_nowait(None)
+        await writer
+
+def print_summary(stats, title):
+    """Print download/skip/fail counts for the session."""
+    print(f"\n📊 {title}:")
+    print(f"  ✅ Downloaded: {stats['completed']}")
+    print(f"  ⏭️  Skipped: {stats['skipped']}")
+    print(f"  ❌ Failed: {stats['failed']}")
+
 def replace_mode(songs, search_query=None):
     """Replace mode: search for and replace existing audio files."""
     print("\n🔄 REPLACE MODE")
@@ -178,6 +620,11 @@ def replace_mode(songs, search_query=None):
     print("Search for songs to replace their audio files.")
     print("=" * 60)
     
+    # Read the audio folder once and keep it up to date as files are replaced,
+    # instead of checking each search result on disk
+    existing = existing_audio_files()
+    index = SongSearchIndex(songs)
+    
     while True:
         # Get search query
         if search_query:
@@ -195,27 +642,26 @@ def replace_mode(songs, search_query=None):
             continue
         
         # Search for matching songs
-        results = search_songs(songs, query)
+        results = index.search(query)
         
         if not results:
             print(f"  ❌ No songs found matching '{query}'")
             continue
         
         # Show results
-        print(f"\n📋 Found {len(results)} matching song(s):")
+        listing = [f"\n📋 Found {len(results)} matching song(s):"]
         for i, song in enumerate(results[:20], 1):  # Limit to 20 results
             title = song.get('title', 'Unknown')
             romaji = song.get('romaji', '')
             artist = song.get('artist', 'Unknown')
-            audio_filename = get_audio_filename(song)
-            audio_path = AUDIO_DIR / audio_filename
-            has_audio = "✅" if audio_path.exists() else "❌"
+            has_audio = "✅" if song['audio_filename'] in existing else "❌"
             
             display_title = romaji if romaji else title
-            print(f"  {i}. [{has_audio}] {display_title} - {artist}")
+            listing.append(f"  {i}. [{has_audio}] {display_title} - {artist}")
         
         if len(results) > 20:
-            print(f"  ... and {len(results) - 20} more results")
+            listing.append(f"  ... and {len(results) - 20} more results")
+        print("\n".join(listing))
         
         # Select song to replace
         selection = get_user_input("\n🎯 Enter number to select (or 'b' to go back): ")
@@ -234,21 +680,10 @@ def replace_mode(songs, search_query=None):
         
         # Selected song
         song = results[idx]
-        title = song.get('title', 'Unknown')
-        romaji = song.get('romaji', '')
-        artist = song.get('artist', 'Unknown')
-        audio_filename = get_audio_filename(song)
-        audio_path = AUDIO_DIR / audio_filename
+        audio_filename = song['audio_filename']
+        audio_path = song['audio_path']
         
-        print(f"\n{'=' * 60}")
-        print(f"Selected Song:")
-        print(f"  Title (JP):  {title}")
-        if romaji:
-            print(f"  Title (Rom): {romaji}")
-        print(f"  Artist:      {artist}")
-        print(f"  Filename:    {audio_filename}")
-        print(f"  Has Audio:   {'Yes' if audio_path.exists() else 'No'}")
-        print(f"{'=' * 60}")
+        print(format_song_info(song, "Selected Song:", f"  Has Audio:   {'Yes' if audio_filename in existing else 'No'}"))
         
         # Get YouTube URL
         url = get_user_input("\n🔗 Enter YouTube URL (or 'b' to go back): ")
@@ -260,7 +695,7 @@ def replace_mode(songs, search_query=None):
             print("  ⚠️  No URL provided")
             continue
         
-        if not ('youtube.com' in url or 'youtu.be' in url):
+        if not youtube_video_id(url):
             print("  ⚠️  This doesn't look like a YouTube URL.")
             continue
         
@@ -273,6 +708,7 @@ def replace_mode(songs, search_query=None):
             
             try:
                 audio_path.unlink()
+                existing.discard(audio_filename)
                 print(f"  🗑️  Deleted existing file: {audio_filename}")
             except Exception as e:
                 print(f"  ❌ Failed to delete existing file: {e}")
@@ -281,37 +717,15 @@ def replace_mode(songs, search_query=None):
         # Download new audio
         print(f"  📥 Downloading from: {url}")
         
-        # Get list of mp3 files before download
-        files_before = {f: f.stat().st_mtime for f in AUDIO_DIR.glob('*.mp3')}
-        
-        if download_audio(url, audio_path):
-            import time
-            time.sleep(0.5)
-            
-            if audio_path.exists():
-                print(f"  ✅ Successfully saved: {audio_filename}")
-                copy_to_new_songs(audio_path)
-            else:
-                # Check for new files (yt-dlp may have sanitized the filename)
-                files_after = {f: f.stat().st_mtime for f in AUDIO_DIR.glob('*.mp3')}
-                new_files = [f for f, mtime in files_after.items() 
-                            if f not in files_before or mtime > files_before.get(f, 0)]
-                
-                if new_files:
-                    new_file = new_files[0]
-                    print(f"  🔄 Renaming '{new_file.name}' to '{audio_filename}'")
-                    try:
-                        new_file.rename(audio_path)
-                        print(f"  ✅ Successfully saved: {audio_filename}")
-                        copy_to_new_songs(audio_path)
-                    except Exception as e:
-                        print(f"  ⚠️  Rename failed: {e}")
-                        print(f"  ✅ File saved as: {new_file.name}")
-                        copy_to_new_songs(new_file)
-                else:
-                    print(f"  ⚠️  Download completed but file not found")
-        else:
+        saved_path = download_audio(url, audio_path)
+        if saved_path is None or not saved_path.exists():
             print(f"  ❌ Download failed")
+            continue
+        
+        saved_path = move_into_place(saved_path, audio_path)
+        existing.add(saved_path.name)
+        print(f"  ✅ Successfully saved: {saved_path.name}")
+        copy_to_new_songs(saved_path)
 
 
 def main():
@@ -348,7 +762,7 @@ def main():
     progress = load_progress()
     
     # Filter out already processed songs
-    processed_ids = set(progress.get("skipped", []) + progress.get("completed", []))
+    processed_ids = progress["skipped"] | progress["completed"]
     remaining_songs = [s for s in missing_songs if s["song_id"] not in processed_ids]
     
     if len(remaining_songs) < len(missing_songs):
@@ -363,186 +777,49 @@ def main():
         return
     
     # Statistics
-    downloaded = 0
-    skipped = 0
-    failed = 0
+    stats = {"completed": 0, "skipped": 0, "failed": 0}
     
     print("\n" + "=" * 60)
     print("Commands:")
-    print("  - Enter YouTube URL to download")
+    print("  - Enter YouTube URL to download (runs in the background)")
     print("  - Enter 's' to skip this song")
     print("  - Enter 'q' to quit")
     print("  - Enter 'list' to see first 10 remaining songs")
     print("=" * 60)
     
+    progress_log = ProgressLog(progress)
     try:
-        for i, song in enumerate(remaining_songs, 1):
-            title = song.get('title', 'Unknown')
-            romaji = song.get('romaji', '')
-            artist = song.get('artist', 'Unknown')
-            song_id = song.get('song_id')
-            audio_filename = get_audio_filename(song)
-            
-            print(f"\n{'=' * 60}")
-            print(f"[{i}/{len(remaining_songs)}] Song Information:")
-            print(f"  Title (JP):  {title}")
-            if romaji:
-                print(f"  Title (Rom): {romaji}")
-            print(f"  Artist:      {artist}")
-            print(f"  Filename:    {audio_filename}")
-            print(f"{'=' * 60}")
-            
-            while True:
-                user_input = get_user_input("\n🔗 Enter YouTube URL (or 's' to skip, 'q' to quit, 'list' to preview): ")
-                
-                if user_input is None or user_input.lower() == 'q':
-                    print("\n👋 Quitting...")
-                    save_progress(progress)
-                    print(f"\n📊 Session Summary:")
-                    print(f"  ✅ Downloaded: {downloaded}")
-                    print(f"  ⏭️  Skipped: {skipped}")
-                    print(f"  ❌ Failed: {failed}")
-                    return
-                
-                if user_input.lower() == 's':
-                    print("  ⏭️  Skipped")
-                    skipped += 1
-                    progress["skipped"].append(song_id)
-                    save_progress(progress)
-                    break
-                
-                if user_input.lower() == 'list':
-                    print("\n📋 Next 10 songs:")
-                    for j in range(i, min(i + 10, len(remaining_songs) + 1)):
-                        if j <= len(remaining_songs):
-                            s = remaining_songs[j-1]
-                            print(f"  {j}. {s.get('romaji') or s.get('title')} - {s.get('artist')}")
-                    continue
-                
-                if not user_input:
-                    print("  ⚠️  Please enter a valid URL or command")
-                    continue
-                
-                # Validate URL format
-                if not ('youtube.com' in user_input or 'youtu.be' in user_input):
-                    print("  ⚠️  This doesn't look like a YouTube URL. Try again.")
-                    continue
-                
-                # Try to download
-                audio_path = AUDIO_DIR / audio_filename
-                print(f"  📥 Downloading from: {user_input}")
-                
-                # Get list of mp3 files before download (with modification times)
-                files_before = {f: f.stat().st_mtime for f in AUDIO_DIR.glob('*.mp3')}
-                
-                if download_audio(user_input, audio_path):
-                    # Small delay to ensure file is written
-                    import time
-                    time.sleep(0.5)
-                    
-                    # Check if expected file exists
-                    if audio_path.exists():
-                        print(f"  ✅ Successfully saved: {audio_filename}")
-                        copy_to_new_songs(audio_path)
-                        downloaded += 1
-                        progress["completed"].append(song_id)
-                        save_progress(progress)
-                        break
-                    else:
-                        # Check for new or modified files (yt-dlp may have sanitized the filename)
-                        files_after = {f: f.stat().st_mtime for f in AUDIO_DIR.glob('*.mp3')}
-                        
-                        # Find new files or files with updated modification time
-                        new_files = []
-                        for f, mtime in files_after.items():
-                            if f not in files_before or mtime > files_before.get(f, 0):
-                                new_files.append(f)
-                        
-                        if new_files:
-                            # Rename the new file to expected filename
-                            new_file = new_files[0]
-                            print(f"  🔄 Renaming '{new_file.name}' to '{audio_filename}'")
-                            try:
-                                new_file.rename(audio_path)
-                                print(f"  ✅ Successfully saved: {audio_filename}")
-                                copy_to_new_songs(audio_path)
-                                downloaded += 1
-                                progress["completed"].append(song_id)
-                                save_progress(progress)
-                                break
-                            except Exception as e:
-                                print(f"  ⚠️  Rename failed: {e}")
-                                print(f"  ✅ File saved as: {new_file.name}")
-                                copy_to_new_songs(new_file)
-                                downloaded += 1
-                                progress["completed"].append(song_id)
-                                save_progress(progress)
-                                break
-                        else:
-                            # Try searching by base name pattern (without extension issues)
-                            base_name = audio_filename.replace('.mp3', '').replace('.', '')
-                            matching_files = [f for f in AUDIO_DIR.glob('*.mp3') 
-                                            if base_name[:5].lower() in f.name.lower()]
-                            if matching_files:
-                                # Get most recently modified
-                                newest = max(matching_files, key=lambda f: f.stat().st_mtime)
-                                print(f"  🔄 Found matching file: '{newest.name}'")
-                                try:
-                                    newest.rename(audio_path)
-                                    print(f"  ✅ Successfully saved: {audio_filename}")
-                                    copy_to_new_songs(audio_path)
-                                    downloaded += 1
-                                    progress["completed"].append(song_id)
-                                    save_progress(progress)
-                                    break
-                                except Exception as e:
-                                    print(f"  ⚠️  Rename failed: {e}")
-                                    print(f"  ✅ File saved as: {newest.name}")
-                                    copy_to_new_songs(newest)
-                                    downloaded += 1
-                                    progress["completed"].append(song_id)
-                                    save_progress(progress)
-                                    break
-                            else:
-                                print(f"  ⚠️  Download completed but file not found. Retrying...")
-                else:
-                    print(f"  ❌ Download failed. Try a different URL or skip.")
-                    retry = get_user_input("  Retry with different URL? (y/n): ")
-                    if retry and retry.lower() != 'y':
-                        print("  ⏭️  Skipping this song")
-                        skipped += 1
-                        progress["skipped"].append(song_id)
-                        save_progress(progress)
-                        break
-        
-        # Final summary
-        print("\n" + "=" * 60)
-        print("🎉 All songs processed!")
-        print("=" * 60)
-        print("📊 Final Summary:")
-        print(f"  ✅ Downloaded: {downloaded}")
-        print(f"  ⏭️  Skipped: {skipped}")
-        print(f"  ❌ Failed: {failed}")
-        print(f"  📁 Total audio files: {len(list(AUDIO_DIR.glob('*.mp3')))}")
-        
-        # Clean up progress file if everything is done
-        if not skipped and not failed:
-            if PROGRESS_FILE.exists():
-                PROGRESS_FILE.unlink()
-                print("\n✨ Progress file cleaned up")
-    
+        finished = asyncio.run(process_songs(remaining_songs, progress_log, stats))
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
-        save_progress(progress)
-        print(f"\n📊 Session Summary:")
-        print(f"  ✅ Downloaded: {downloaded}")
-        print(f"  ⏭️  Skipped: {skipped}")
-        print(f"  ❌ Failed: {failed}")
+        progress_log.close()
+        print_summary(stats, "Session Summary")
         print("\n💾 Progress saved! Run the script again to continue.")
+        return
     except Exception as e:
         print(f"\n\n❌ Error: {e}")
-        save_progress(progress)
+        progress_log.close()
         raise
+    
+    progress_log.close()
+    if not finished:
+        print_summary(stats, "Session Summary")
+        return
+    
+    # Final summary
+    print("\n" + "=" * 60)
+    print("🎉 All songs processed!")
+    print("=" * 60)
+    print_summary(stats, "Final Summary")
+    print(f"  📁 Total audio files: {sum(name.endswith('.mp3') for name in existing_audio_files())}")
+    
+    # Clean up progress files if everything is done (failed songs were
+    # asked for again, so they ended up either downloaded or skipped)
+    if not stats["skipped"]:
+        if PROGRESS_FILE.exists():
+            PROGRESS_FILE.unlink()
+            print("\n✨ Progress file cleaned up")
+        PROGRESS_LOG.unlink(missing_ok=True)
 
 if __name__ == "__main__":
     main()
@@ -3,34 +3,62 @@ Script to manually replace audio files for specific MaiMai songs.
 Search for a song and provide a YouTube link to download/replace its audio.
 """
 
+import argparse
+import asyncio
+import csv
 import json
 import os
 from pathlib import Path
 import yt_dlp
 import sys
-import time
+import threading
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration
 AUDIO_DIR = Path("audio")
 OUTPUT_JSON = Path("output.json")
 AUDIO_FORMAT = "mp3"
 AUDIO_QUALITY = "5"  # 0=best, 9=worst
+BATCH_WORKERS = 4  # Downloads running at once in batch mode
 
 # Create audio directory if it doesn't exist
 AUDIO_DIR.mkdir(exist_ok=True)
 
+def iter_charts():
+    """
+    Yield chart entries from output.json.
+    
+    With ijson installed, entries are parsed one at a time, so charts that get
+    filtered out are never all held in memory at once.
+    """
+    with open(OUTPUT_JSON, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, 'item', use_float=True)
+        elif orjson is not None:
+            yield from orjson.loads(f.read())
+        else:
+            yield from json.load(f)
+
 def load_songs():
     """Load and filter songs from output.json (master difficulty only)."""
-    with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
-        songs = json.load(f)
-    
     # Filter to master difficulty and deduplicate by song_id
     master_songs = {}
-    for song in songs:
+    for song in iter_charts():
         if song.get('difficulty') == 'master':
-            song_id = song['song_id']
-            if song_id not in master_songs:
-                master_songs[song_id] = song
+            master_songs.setdefault(song['song_id'], song)
+    
+    # Work out each song's audio filename once instead of at every use
+    for song in master_songs.values():
+        song['audio_filename'] = get_audio_filename(song)
     
     return list(master_songs.values())
 
@@ -42,38 +70,73 @@ def get_audio_filename(song):
     else:
         return f"{song['song_id']}.mp3"
 
-def search_songs(songs, query):
-    """Search songs by title, romaji, or artist."""
-    query_lower = query.lower()
-    results = []
+def existing_audio_files():
+    """Get the names of all files in AUDIO_DIR with a single directory read."""
+    with os.scandir(AUDIO_DIR) as entries:
+        return {entry.name for entry in entries if entry.is_file()}
+
+class SongSearchIndex:
+    """
+    Case-insensitive substring search over song titles, romaji, artists and
+    English titles.
     
-    for song in songs:
-        title = song.get('title', '').lower()
-        romaji = song.get('romaji', '').lower()
-        artist = song.get('artist', '').lower()
-        english = song.get('english', '').lower()
-        
-        if (query_lower in title or 
-            query_lower in romaji or 
-            query_lower in artist or
-            query_lower in english):
-            results.append(song)
+    Fields are lowercased once up front, and every 3-character substring maps
+    to the songs containing it. A query only has to check the songs that
+    contain all of its trigrams instead of scanning the whole catalog.
+    """
+    
+    SEARCH_FIELDS = ('title', 'romaji', 'artist', 'english')
     
-    return results
+    def __init__(self, songs):
+        self.songs = songs
+        self.keys = []
+        self.trigrams = {}
+        for i, song in enumerate(songs):
+            fields = tuple((song.get(field) or '').lower() for field in self.SEARCH_FIELDS)
+            self.keys.append(fields)
+            for text in fields:
+                for j in range(len(text) - 2):
+                    self.trigrams.setdefault(text[j:j + 3], set()).add(i)
+    
+    def search(self, query):
+        """
+        Find songs where any search field contains query.
+        
+        Returns:
+            Matching songs, in catalog order
+        """
+        query_lower = query.lower()
+        
+        if len(query_lower) < 3:
+            candidates = range(len(self.songs))
+        else:
+            postings = [self.trigrams.get(query_lower[j:j + 3], set()) for j in range(len(query_lower) - 2)]
+            candidates = sorted(set.intersection(*sorted(postings, key=len)))
+        
+        keys = self.keys
+        return [
+            self.songs[i] for i in candidates
+            if any(query_lower in text for text in keys[i])
+        ]
 
-def download_audio(url, output_path):
-    """Download audio from YouTube URL."""
+def build_ydl_opts(quiet):
+    """
+    Build the yt-dlp options shared by every download in a session.
+    
+    Args:
+        quiet: Hide yt-dlp's output and progress bars (for parallel downloads)
+    """
     cookies_file = Path("cookies.txt")
     
     ydl_opts = {
         'format': 'bestaudio/best',
-        'outtmpl': str(output_path.with_suffix('')),
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
             'preferredcodec': AUDIO_FORMAT,
             'preferredquality': AUDIO_QUALITY,
         }],
-        'quiet': False,
+        'quiet': quiet,
+        'noprogress': quiet,
         'no_warnings': False,
         'noplaylist': True,
         'http_headers': {
@@ -89,23 +152,60 @@ def download_audio(url, output_path):
     if cookies_file.exists():
         ydl_opts['cookiefile'] = str(cookies_file)
     
+    return ydl_opts
+
+_ydl_local = threading.local()  # One YoutubeDL per thread (and per quiet setting)
+
+def get_ydl(quiet):
+    """
+    Get this thread's YoutubeDL instance, creating it on first use.
+    
+    Reusing the instance keeps extractors, HTTP connections and signature
+    data between downloads. Batch downloads run on several threads and each
+    one points outtmpl at its own song, so every thread needs its own.
+    """
+    instances = getattr(_ydl_local, 'instances', None)
+    if instances is None:
+        instances = _ydl_local.instances = {}
+    if quiet not in instances:
+        instances[quiet] = yt_dlp.YoutubeDL(build_ydl_opts(quiet))
+    return instances[quiet]
+
+def download_audio(url, output_path, quiet=False):
+    """
+    Download audio from YouTube URL.
+    
+    Returns:
+        Path of the downloaded audio file, or None if the download failed
+    """
+    ydl = get_ydl(quiet)
+    # Without extension, and with '%' escaped so yt-dlp doesn't treat it as a template field
+    ydl.params['outtmpl'] = {'default': str(output_path.with_suffix('')).replace('%', '%%')}
+    
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        return True
+        info = ydl.extract_info(url, download=True)
     except Exception as e:
         print(f"  ❌ Download error: {e}")
-        return False
+        return None
+    
+    downloads = info.get('requested_downloads') or [{}]
+    return Path(downloads[-1].get('filepath') or output_path)
 
-def display_song(song, index=None):
-    """Display song information."""
+def display_song(song, existing, index=None):
+    """
+    Display song information.
+    
+    Args:
+        song: Song to display
+        existing: Filenames currently in AUDIO_DIR, from existing_audio_files()
+        index: Optional number to show before the song
+    """
     prefix = f"[{index}] " if index is not None else ""
     title = song.get('title', 'Unknown')
     romaji = song.get('romaji', '')
     artist = song.get('artist', 'Unknown')
-    audio_filename = get_audio_filename(song)
-    audio_path = AUDIO_DIR / audio_filename
-    has_audio = "✅" if audio_path.exists() else "❌"
+    audio_filename = song['audio_filename']
+    has_audio = "✅" if audio_filename in existing else "❌"
     
     print(f"{prefix}{has_audio} {romaji or title}")
     if romaji and romaji != title:
@@ -113,7 +213,88 @@ def display_song(song, index=None):
     print(f"    Artist: {artist}")
     print(f"    File: {audio_filename}")
 
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="MaiMai Audio Replacer")
+    parser.add_argument('--batch', '-b', type=Path, default=None,
+                        help='Replace audio for every song_id/url pair in a JSON or CSV file')
+    return parser.parse_args()
+
+def load_batch(batch_file):
+    """
+    Load (song_id, url) pairs for batch mode.
+    
+    Args:
+        batch_file: JSON list of {"song_id": ..., "url": ...} objects, or a CSV
+            file with song_id and url columns
+    
+    Returns:
+        List of (song_id, url) tuples
+    """
+    with open(batch_file, 'r', encoding='utf-8', newline='') as f:
+        if batch_file.suffix.lower() == '.json':
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    return [(row['song_id'].strip(), row['url'].strip()) for row in rows]
+
+def replace_one(song, url):
+    """
+    Replace one song's audio, keeping a backup until the download succeeds.
+    
+    Returns:
+        True if the new audio file was saved
+    """
+    audio_path = AUDIO_DIR / song['audio_filename']
+    backup_path = audio_path.with_suffix('.mp3.bak')
+    if audio_path.exists():
+        audio_path.replace(backup_path)
+    
+    saved_path = download_audio(url, audio_path, quiet=True)
+    if saved_path is not None and saved_path != audio_path and saved_path.exists():
+        saved_path.replace(audio_path)
+    if saved_path is not None and audio_path.exists():
+        backup_path.unlink(missing_ok=True)
+        return True
+    
+    if backup_path.exists():
+        backup_path.replace(audio_path)
+    return False
+
+async def batch_replace(songs, jobs):
+    """
+    Replace audio for many songs, running BATCH_WORKERS downloads at once.
+    
+    Args:
+        songs: Songs from load_songs()
+        jobs: (song_id, url) pairs from load_batch()
+    """
+    songs_by_id = {song['song_id']: song for song in songs}
+    sem = asyncio.Semaphore(BATCH_WORKERS)
+    
+    async def run(song_id, url):
+        song = songs_by_id.get(song_id)
+        if song is None:
+            print(f"  ⚠️ Unknown song_id: {song_id}")
+            return False
+        name = song.get('romaji') or song.get('title', 'Unknown')
+        async with sem:
+            print(f"  📥 Downloading {name} from: {url}")
+            saved = await asyncio.to_thread(replace_one, song, url)
+        print(f"  {'✅ Saved' if saved else '❌ Failed'}: {name}")
+        return saved
+    
+    results = await asyncio.gather(*(run(song_id, url) for song_id, url in jobs), return_exceptions=True)
+    
+    saved = sum(result is True for result in results)
+    for (song_id, _), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            print(f"  ❌ {song_id}: {result}")
+    print(f"\n📊 Batch done: {saved} saved, {len(jobs) - saved} failed")
+
 def main():
+    args = parse_args()
+    
     print("🎵 MaiMai Audio Replacer")
     print("=" * 60)
     print("Search for songs and provide YouTube links to download/replace audio.")
@@ -122,8 +303,15 @@ def main():
     # Load songs
     print("\n📂 Loading songs...")
     songs = load_songs()
+    index = SongSearchIndex(songs)
     print(f"✅ Loaded {len(songs)} songs")
     
+    if args.batch:
+        jobs = load_batch(args.batch)
+        print(f"\n📋 Replacing audio for {len(jobs)} song(s) from {args.batch}")
+        asyncio.run(batch_replace(songs, jobs))
+        return
+    
     print("\nCommands:")
     print("  - Type a search query to find songs")
     print("  - Type 'missing' to list songs without audio")
@@ -146,16 +334,17 @@ def main():
         
         # Special command: list missing audio
         if query.lower() == 'missing':
-            missing = [s for s in songs if not (AUDIO_DIR / get_audio_filename(s)).exists()]
+            existing = existing_audio_files()
+            missing = [s for s in songs if s['audio_filename'] not in existing]
             print(f"\n📋 Songs without audio ({len(missing)}):")
             for i, song in enumerate(missing[:20], 1):
-                display_song(song, i)
+                display_song(song, existing, i)
             if len(missing) > 20:
                 print(f"  ... and {len(missing) - 20} more")
             continue
         
         # Search for songs
-        results = search_songs(songs, query)
+        results = index.search(query)
         
         if not results:
             print("  No songs found matching your query.")
@@ -163,8 +352,9 @@ def main():
         
         print(f"\n📋 Found {len(results)} song(s):")
         display_limit = min(len(results), 20)
+        existing = existing_audio_files()
         for i, song in enumerate(results[:display_limit], 1):
-            display_song(song, i)
+            display_song(song, existing, i)
         
         if len(results) > 20:
             print(f"  ... and {len(results) - 20} more (refine your search)")
@@ -195,10 +385,10 @@ def main():
         # Show selected song details
         print("\n" + "=" * 60)
         print("Selected song:")
-        display_song(selected_song)
+        display_song(selected_song, existing)
         print("=" * 60)
         
-        audio_filename = get_audio_filename(selected_song)
+        audio_filename = selected_song['audio_filename']
         audio_path = AUDIO_DIR / audio_filename
         
         if audio_path.exists():
@@ -233,11 +423,17 @@ def main():
         # Download
         print(f"\n📥 Downloading...")
         
-        # Track files before download
-        files_before = {f: f.stat().st_mtime for f in AUDIO_DIR.glob('*.mp3')}
-        
-        if download_audio(url, audio_path):
-            time.sleep(0.5)
+        saved_path = download_audio(url, audio_path)
+        if saved_path is not None:
+            # yt-dlp reports where the post-processed file ended up, so it can
+            # be moved into place without scanning the audio folder
+            if saved_path != audio_path and saved_path.exists():
+                print(f"  🔄 Renaming '{saved_path.name}' to '{audio_filename}'")
+                try:
+                    saved_path.rename(audio_path)
+                except Exception as e:
+                    print(f"  ⚠️ Rename failed: {e}")
+                    print(f"  File saved as: {saved_path.name}")
             
             if audio_path.exists():
                 print(f"\n✅ Successfully saved: {audio_filename}")
@@ -249,31 +445,16 @@ def main():
                         print(f"   🗑️ Removed backup file")
                     except:
                         pass
-            else:
-                # Try to find the downloaded file
-                files_after = {f: f.stat().st_mtime for f in AUDIO_DIR.glob('*.mp3')}
-                new_files = [f for f, mtime in files_after.items() 
-                           if f not in files_before or mtime > files_before.get(f, 0)]
-                
-                if new_files:
-                    new_file = new_files[0]
-                    print(f"  🔄 Renaming '{new_file.name}' to '{audio_filename}'")
+            elif not saved_path.exists():
+                print(f"  ⚠️ Download completed but file not found.")
+                # Restore backup if available
+                backup_path = audio_path.with_suffix('.mp3.bak')
+                if backup_path.exists():
                     try:
-                        new_file.rename(audio_path)
-                        print(f"\n✅ Successfully saved: {audio_filename}")
-                    except Exception as e:
-                        print(f"  ⚠️ Rename failed: {e}")
-                        print(f"  File saved as: {new_file.name}")
-                else:
-                    print(f"  ⚠️ Download completed but file not found.")
-                    # Restore backup if available
-                    backup_path = audio_path.with_suffix('.mp3.bak')
-                    if backup_path.exists():
-                        try:
-                            backup_path.rename(audio_path)
-                            print(f"  🔄 Restored backup")
-                        except:
-                            pass
+                        backup_path.rename(audio_path)
+                        print(f"  🔄 Restored backup")
+                    except:
+                        pass
         else:
             print(f"\n❌ Download failed.")
             # Restore backup if available
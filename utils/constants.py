@@ -2,24 +2,25 @@
 Constants for the MaiMai quiz bot, including available categories and versions.
 """
 
+from types import MappingProxyType
+
 # Available categories in MaiMai (Japanese: English)
-CATEGORIES = {
+CATEGORIES = MappingProxyType({
     "POPS＆アニメ": "pops",
     "niconico＆ボーカロイド": "vocaloid", 
     "東方Project": "touhou",
     "ゲーム＆バラエティ": "game",
     "maimai": "maimai",
     "オンゲキ＆CHUNITHM": "ongeki"
-}
+})
 
-# Create reverse mapping for lookups (lowercase English -> Japanese)
-CATEGORY_MAPPING = {v.lower(): k for k, v in CATEGORIES.items()}
-# Also add Japanese names in the mapping (lowercase -> original)
-for jp_name in CATEGORIES.keys():
-    CATEGORY_MAPPING[jp_name.lower()] = jp_name
+# Reverse mapping for lookups (lowercase English or Japanese name -> Japanese)
+CATEGORY_MAPPING = MappingProxyType({
+    name.lower(): jp_name for jp_name, en_name in CATEGORIES.items() for name in (en_name, jp_name)
+})
 
 # Available game versions (Japanese: English)
-VERSIONS = {
+VERSIONS = MappingProxyType({
     "maimai": "maimai",
     "maimai PLUS": "maimai plus",
     "GreeN": "green",
@@ -48,10 +49,9 @@ VERSIONS = {
     "CiRCLE": "circle",
     "宴会場": "banquet",
     "うちゅう": "uchuu"
-}
+})
 
-# Create reverse mapping for lookups (lowercase English -> Japanese)
-VERSION_MAPPING = {v.lower(): k for k, v in VERSIONS.items()}
-# Also add Japanese names in the mapping (lowercase -> original)
-for jp_name in VERSIONS.keys():
-    VERSION_MAPPING[jp_name.lower()] = jp_name
+# Reverse mapping for lookups (lowercase English or Japanese name -> Japanese)
+VERSION_MAPPING = MappingProxyType({
+    name.lower(): jp_name for jp_name, en_name in VERSIONS.items() for name in (en_name, jp_name)
+})
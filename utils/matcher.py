@@ -4,13 +4,25 @@ Handles both Japanese and romaji answers with partial matching.
 """
 
 from difflib import SequenceMatcher
-import re
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, List
 
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# Common punctuation to replace with spaces (Japanese characters are kept)
+PUNCTUATION_TABLE = str.maketrans({c: ' ' for c in '!@#$%^&*()_+-=[]{};\':"\\|,.<>/?`~'})
+
+@lru_cache(maxsize=4096)
 def normalize_string(text: str) -> str:
     """
     Normalize string for matching: lowercase, remove punctuation, strip whitespace.
     
+    Results are cached, since the same song titles come up again in later
+    rounds and players often repeat the same guesses.
+    
     Args:
         text: String to normalize
     
@@ -24,13 +36,43 @@ def normalize_string(text: str) -> str:
     text = text.lower()
     
     # Remove common punctuation (but keep Japanese characters)
-    text = re.sub(r'[!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>/?`~]', ' ', text)
+    text = text.translate(PUNCTUATION_TABLE)
     
     # Remove extra whitespace
     text = ' '.join(text.split())
     
     return text
 
+@lru_cache(maxsize=1024)
+def _target_matcher(target: str) -> SequenceMatcher:
+    """
+    Get a SequenceMatcher with target as its second sequence.
+    
+    SequenceMatcher indexes its second sequence when it's set, so keeping one
+    per answer means each new guess only has to set the first sequence.
+    """
+    matcher = SequenceMatcher(None, autojunk=False)
+    matcher.set_seq2(target)
+    return matcher
+
+def is_similar(a: str, b: str, threshold: float) -> bool:
+    """
+    Check if two strings' similarity ratio (0-1) reaches threshold.
+    
+    The ratio is always difflib's, so a guess is graded the same whether or
+    not RapidFuzz is installed. RapidFuzz's ratio is an upper bound on it, so
+    when available it's only used to reject non-matches quickly. After that,
+    the cheap upper bounds real_quick_ratio() and quick_ratio() are tried
+    before the full comparison.
+    """
+    if fuzz is not None and fuzz.ratio(a, b) < threshold * 100:
+        return False
+    matcher = _target_matcher(b)
+    matcher.set_seq1(a)
+    return (matcher.real_quick_ratio() >= threshold
+            and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
 def fuzzy_match(guess: str, target: str, threshold: float = 0.8) -> bool:
     """
     Check if guess matches target using fuzzy string matching.
@@ -44,9 +86,20 @@ def fuzzy_match(guess: str, target: str, threshold: float = 0.8) -> bool:
     Returns:
         True if match is found
     """
-    guess_norm = normalize_string(guess)
-    target_norm = normalize_string(target)
+    return fuzzy_match_normalized(normalize_string(guess), normalize_string(target), threshold)
+
+def fuzzy_match_normalized(guess_norm: str, target_norm: str, threshold: float = 0.8) -> bool:
+    """
+    Same as fuzzy_match, for strings already passed through normalize_string.
+    
+    Args:
+        guess_norm: Normalized user's guess
+        target_norm: Normalized correct answer
+        threshold: Base similarity threshold (0-1, default 0.8)
     
+    Returns:
+        True if match is found
+    """
     if not guess_norm or not target_norm:
         return False
     
@@ -83,8 +136,7 @@ def fuzzy_match(guess: str, target: str, threshold: float = 0.8) -> bool:
             return True
         # Also check first N characters with some leniency
         check_len = min(len(guess_norm), len(target_norm))
-        start_similarity = SequenceMatcher(None, guess_norm[:check_len], target_norm[:check_len]).ratio()
-        if start_similarity >= 0.85:
+        if is_similar(guess_norm[:check_len], target_norm[:check_len], 0.85):
             return True
     
     # Adjust threshold based on target length (more lenient for longer targets)
@@ -95,9 +147,14 @@ def fuzzy_match(guess: str, target: str, threshold: float = 0.8) -> bool:
     elif target_len > 15:
         threshold = min(threshold, 0.75)
     
+    # The ratio can't exceed 2 * shorter / (both lengths), so skip the full
+    # comparison when the lengths alone are too far apart
+    guess_len = len(guess_norm)
+    if 2 * min(guess_len, target_len) < threshold * (guess_len + target_len):
+        return False
+    
     # Use fuzzy matching for similarity
-    similarity = SequenceMatcher(None, guess_norm, target_norm).ratio()
-    return similarity >= threshold
+    return is_similar(guess_norm, target_norm, threshold)
 
 def check_difficulty(guess: str, song: Dict, exact_only: bool = False) -> bool:
     """
@@ -141,27 +198,65 @@ def check_answer(guess: str, song: Dict, answer_type: str = "title", threshold:
     Returns:
         True if the guess is correct
     """
-    if answer_type == "title":
-        # Check against Japanese title, romaji, and English translation
-        japanese_title = song.get('title', '')
-        romaji_title = song.get('romaji', '')
-        english_title = song.get('english', '')
-        
-        if fuzzy_match(guess, japanese_title, threshold):
-            return True
-        if romaji_title and fuzzy_match(guess, romaji_title, threshold):
-            return True
-        if english_title and fuzzy_match(guess, english_title, threshold):
-            return True
+    return AnswerMatcher.build(song, answer_type, threshold).match(guess)
+
+class AnswerMatcher:
+    """
+    Matches guesses against one song's answer.
     
-    elif answer_type == "artist":
-        # Check against artist name
-        artist = song.get('artist', '')
-        if fuzzy_match(guess, artist, threshold):
-            return True
+    The accepted answers are normalized once when the matcher is built, so a
+    round only normalizes each guess, not every target again per guess.
+    """
     
-    elif answer_type == "difficulty":
-        # Check difficulty level (exact match required)
-        return check_difficulty(guess, song, exact_only=True)
+    def __init__(self, song: Dict, answer_type: str, targets: List[str], threshold: float):
+        self.song = song
+        self.answer_type = answer_type
+        self.targets = targets  # Normalized accepted answers
+        self.threshold = threshold
     
-    return False
+    @classmethod
+    def build(cls, song: Dict, answer_type: str = "title", threshold: float = 0.8) -> "AnswerMatcher":
+        """
+        Build a matcher for a song's answer.
+        
+        Args:
+            song: Song dictionary from output.json
+            answer_type: "title", "artist", or "difficulty"
+            threshold: Fuzzy matching threshold (0-1)
+        
+        Returns:
+            AnswerMatcher for the song
+        """
+        if answer_type == "title":
+            # Accept the Japanese title, romaji, and English translation
+            answers = [song.get('title', ''), song.get('romaji', ''), song.get('english', '')]
+        elif answer_type == "artist":
+            answers = [song.get('artist', '')]
+        else:
+            # Difficulty guesses are numbers, checked against the level directly
+            answers = []
+        
+        # Drop duplicates (romaji and English are often the same) and try the
+        # shortest answers first, since they're the cheapest to compare
+        targets = sorted(dict.fromkeys(t for t in (normalize_string(a) for a in answers) if t), key=len)
+        return cls(song, answer_type, targets, threshold)
+    
+    def match(self, guess: str) -> bool:
+        """
+        Check if a guess matches the correct answer.
+        
+        Args:
+            guess: User's guess
+        
+        Returns:
+            True if the guess is correct
+        """
+        if self.answer_type == "difficulty":
+            # Check difficulty level (exact match required)
+            return check_difficulty(guess, self.song, exact_only=True)
+        
+        if not self.targets:
+            return False
+        
+        guess_norm = normalize_string(guess)
+        return any(fuzzy_match_normalized(guess_norm, target, self.threshold) for target in self.targets)
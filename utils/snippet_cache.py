@@ -0,0 +1,200 @@
+"""
+On-disk cache of pre-encoded audio snippets for audio quiz rounds.
+
+Each (song, snippet length) pair gets up to SNIPPETS_PER_LENGTH snippets taken
+from random offsets. They are encoded lazily the first few times the pair is
+played and then reused, so later rounds don't need to run ffmpeg at all.
+
+Snippets are tied to the audio file's mtime, so replacing a song's audio
+discards the snippets cut from the old file.
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Get the project root directory (parent of utils/)
+PROJECT_ROOT = Path(__file__).parent.parent
+
+SNIPPET_CACHE_DIR = PROJECT_ROOT / "audio" / "snippets" / "cache"
+SNIPPETS_PER_LENGTH = 3
+
+# Normalize volume for consistent playback between songs. dynaudnorm is much
+# cheaper than a loudnorm (EBU R128) pass and plenty for short quiz snippets
+SNIPPET_AUDIO_FILTER = 'dynaudnorm=p=0.95'
+
+# Resolve ffmpeg/ffprobe once; None if not installed
+FFMPEG_PATH = shutil.which('ffmpeg')
+FFPROBE_PATH = shutil.which('ffprobe')
+
+# (song stem, audio mtime_ns, snippet length) -> cached snippet files
+_snippet_index: Dict[Tuple[str, int, int], List[Path]] = {}
+_index_loaded = False
+_key_locks: Dict[Tuple[str, int, int], asyncio.Lock] = {}
+# (audio path, mtime) -> duration in seconds, or None if ffprobe failed
+_durations: Dict[Tuple[str, float], Optional[float]] = {}
+
+
+def _load_index():
+    """Populate the in-memory index from snippets already on disk."""
+    global _index_loaded
+    _index_loaded = True
+
+    if not SNIPPET_CACHE_DIR.exists():
+        return
+
+    for path in SNIPPET_CACHE_DIR.glob("*.ogg"):
+        # Files are named {stem}_{mtime_ns}_{length}_{i}.ogg, and the stem may contain underscores
+        parts = path.stem.rsplit('_', 3)
+        if len(parts) != 4 or not parts[1].isdigit() or not parts[2].isdigit():
+            # Snippets from before mtimes were recorded can't be checked against their source
+            path.unlink(missing_ok=True)
+            continue
+        _snippet_index.setdefault((parts[0], int(parts[1]), int(parts[2])), []).append(path)
+
+
+def _drop_stale_snippets(stem: str, mtime_ns: int):
+    """Delete cached snippets of a song that were cut from an older version of its audio."""
+    stale = [key for key in _snippet_index if key[0] == stem and key[1] != mtime_ns]
+    for key in stale:
+        for path in _snippet_index.pop(key):
+            path.unlink(missing_ok=True)
+        _key_locks.pop(key, None)
+
+
+async def _run(cmd: List[str], timeout: float) -> Tuple[int, bytes]:
+    """Run a command without blocking the event loop, killing it on timeout."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout
+
+
+async def _probe_duration(audio_path: Path) -> Optional[float]:
+    """
+    Get an audio file's duration in seconds using ffprobe.
+
+    Results are cached by (path, mtime), so a replaced file is probed again.
+    """
+    key = (str(audio_path), audio_path.stat().st_mtime)
+    if key in _durations:
+        return _durations[key]
+
+    probe_cmd = [
+        FFPROBE_PATH,
+        '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        str(audio_path)
+    ]
+
+    returncode, stdout = await _run(probe_cmd, timeout=10)
+    duration = float(stdout.strip()) if returncode == 0 else None
+    _durations[key] = duration
+    return duration
+
+
+async def _encode_snippet(audio_path: Path, start_time: float, snippet_length: int, snippet_path: Path) -> bool:
+    """Encode a snippet of audio_path to an OGG Opus file for voice messages."""
+    snippet_path.parent.mkdir(parents=True, exist_ok=True)
+    # Encode to a unique temp file and move it into place, so a crash mid-encode
+    # never leaves a truncated snippet in the cache
+    temp_path = snippet_path.with_name(f".{uuid.uuid4().hex}.ogg.tmp")
+
+    ffmpeg_cmd = [
+        FFMPEG_PATH,
+        '-ss', str(start_time),
+        '-i', str(audio_path),
+        '-t', str(snippet_length),
+        '-af', SNIPPET_AUDIO_FILTER,
+        '-c:a', 'libopus',
+        '-b:a', '96k',
+        '-vbr', 'on',
+        '-compression_level', '5',
+        '-application', 'audio',  # Tuned for music rather than speech
+        '-f', 'ogg',
+        '-y',
+        str(temp_path)
+    ]
+
+    try:
+        returncode, _ = await _run(ffmpeg_cmd, timeout=30)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    # Only failed encodes leave a temp file behind to clean up
+    if returncode != 0 or not temp_path.exists():
+        temp_path.unlink(missing_ok=True)
+        return False
+    os.replace(temp_path, snippet_path)
+    return True
+
+
+async def get_snippet(audio_path: Path, snippet_length: int) -> Optional[str]:
+    """
+    Get a random snippet of a song, encoding a new one if the cache isn't full yet.
+
+    Args:
+        audio_path: Path to the song's full audio file
+        snippet_length: Snippet length in seconds
+
+    Returns:
+        Path to an OGG snippet, the original audio path if the song is shorter
+        than the snippet, or None if no snippet could be made
+    """
+    if not _index_loaded:
+        _load_index()
+
+    audio_path = Path(audio_path)
+    try:
+        mtime_ns = audio_path.stat().st_mtime_ns
+    except OSError:
+        return None
+    key = (audio_path.stem, mtime_ns, snippet_length)
+
+    if key not in _snippet_index:
+        _drop_stale_snippets(audio_path.stem, mtime_ns)
+
+    lock = _key_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        cached = _snippet_index.setdefault(key, [])
+        if len(cached) >= SNIPPETS_PER_LENGTH:
+            return str(random.choice(cached))
+
+        # Check if ffmpeg and ffprobe are available, otherwise serve what we have
+        if not FFMPEG_PATH or not FFPROBE_PATH:
+            return str(random.choice(cached)) if cached else None
+
+        try:
+            duration = await _probe_duration(audio_path)
+            if duration is None:
+                return None
+
+            # If song is shorter than snippet length, use full song
+            if duration <= snippet_length:
+                return str(audio_path)
+
+            # Pick random start time
+            start_time = random.uniform(0, duration - snippet_length)
+            snippet_path = SNIPPET_CACHE_DIR / f"{key[0]}_{mtime_ns}_{snippet_length}_{len(cached)}.ogg"
+
+            if not await _encode_snippet(audio_path, start_time, snippet_length, snippet_path):
+                return None
+        except Exception:
+            return None
+
+        cached.append(snippet_path)
+        return str(snippet_path)
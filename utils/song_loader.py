@@ -3,12 +3,45 @@ Utility functions for loading and filtering songs from output.json
 """
 
 import json
+import sys
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Get the project root directory (parent of utils/)
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# Difficulties kept by load_songs (a song's remaster counts as its master chart)
+MASTER_DIFFICULTIES = frozenset({'master', 'remaster'})
+
+# Fields with only a handful of distinct values, shared between songs once interned
+INTERNED_FIELDS = ('category', 'version', 'difficulty')
+
+def iter_charts(output_json: Path) -> Iterator[Dict]:
+    """
+    Yield chart entries from output.json.
+    
+    With ijson installed, entries are parsed one at a time, so charts that get
+    filtered out are never all held in memory at once.
+    """
+    with open(output_json, 'rb') as f:
+        if ijson is not None:
+            # Levels like 13.7 must stay floats, not Decimals
+            yield from ijson.items(f, 'item', use_float=True)
+        elif orjson is not None:
+            yield from orjson.loads(f.read())
+        else:
+            yield from json.load(f)
+
 def load_songs(
     difficulty: str = "master",
     category: Optional[str] = None,
@@ -30,15 +63,12 @@ def load_songs(
     if not output_json.exists():
         raise FileNotFoundError(f"output.json not found at {output_json}")
     
-    with open(output_json, 'r', encoding='utf-8') as f:
-        all_songs = json.load(f)
-    
     # Filter songs
     filtered = {}
-    for song in all_songs:
+    current = filtered.get
+    for song in iter_charts(output_json):
         # Apply filters (accept both master and remaster)
-        song_difficulty = song.get('difficulty', '')
-        if difficulty and song_difficulty not in ['master', 'remaster']:
+        if difficulty and song.get('difficulty', '') not in MASTER_DIFFICULTIES:
             continue
         if category and song.get('category') != category:
             continue
@@ -47,14 +77,16 @@ def load_songs(
         
         # Deduplicate by song_id, keeping the higher difficulty level
         song_id = song['song_id']
-        if song_id not in filtered:
+        kept = current(song_id)
+        if kept is None or song.get('level', 0) > kept.get('level', 0):
             filtered[song_id] = song
-        else:
-            # If this song has a higher level, replace it
-            current_level = filtered[song_id].get('level', 0)
-            new_level = song.get('level', 0)
-            if new_level > current_level:
-                filtered[song_id] = song
+    
+    # The JSON parser makes a new string for every occurrence of these values
+    for song in filtered.values():
+        for field in INTERNED_FIELDS:
+            value = song.get(field)
+            if isinstance(value, str):
+                song[field] = sys.intern(value)
     
     return list(filtered.values())
 
@@ -78,22 +110,36 @@ def get_song_audio_path(song: Dict) -> Optional[Path]:
     audio_path = PROJECT_ROOT / "audio" / audio_name
     return audio_path if audio_path.exists() else None
 
-def get_available_categories() -> List[str]:
-    """Get list of all available categories."""
-    output_json = Path("output.json")
+# (output.json mtime, categories, versions) from the last scan
+_catalog_values: Optional[Tuple[float, List[str], List[str]]] = None
+
+def _get_catalog_values() -> Tuple[List[str], List[str]]:
+    """
+    Get the distinct categories and versions in output.json.
+    
+    Both are collected in one pass over the file and cached until output.json
+    changes, so asking for categories and then versions only reads it once.
+    """
+    global _catalog_values
+    output_json = PROJECT_ROOT / "output.json"
+    mtime = output_json.stat().st_mtime
     
-    with open(output_json, 'r', encoding='utf-8') as f:
-        all_songs = json.load(f)
+    if _catalog_values is None or _catalog_values[0] != mtime:
+        categories = set()
+        versions = set()
+        for song in iter_charts(output_json):
+            if song.get('category'):
+                categories.add(song['category'])
+            if song.get('version'):
+                versions.add(song['version'])
+        _catalog_values = (mtime, sorted(categories), sorted(versions))
     
-    categories = set(song.get('category') for song in all_songs if song.get('category'))
-    return sorted(categories)
+    return _catalog_values[1], _catalog_values[2]
+
+def get_available_categories() -> List[str]:
+    """Get list of all available categories."""
+    return list(_get_catalog_values()[0])
 
 def get_available_versions() -> List[str]:
     """Get list of all available versions."""
-    output_json = Path("output.json")
-    
-    with open(output_json, 'r', encoding='utf-8') as f:
-        all_songs = json.load(f)
-    
-    versions = set(song.get('version') for song in all_songs if song.get('version'))
-    return sorted(versions)
+    return list(_get_catalog_values()[1])